@@ -2,7 +2,21 @@
 Analyzers package initialization
 """
 
-from .conflict_detector import ConflictDetector
-from .ambiguity_detector import AmbiguityDetector
+import importlib
+
+# Exported names -> defining submodule, imported on first access (PEP 562)
+_LAZY_ATTRS = {
+    "ConflictDetector": ".conflict_detector",
+    "AmbiguityDetector": ".ambiguity_detector",
+}
 
 __all__ = ["ConflictDetector", "AmbiguityDetector"]
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -3,11 +3,46 @@ Ambiguity detection and risk assessment for clauses
 """
 
 import re
-from typing import List, Tuple
-from sqlalchemy.orm import Session
+from typing import Dict, List, Set, Tuple
+from sqlalchemy.orm import Session, selectinload
 
 from models.database import Clause, Interpretation, RiskLevel
 from config import Config
+from utils.keyword_matcher import KeywordMatcher
+
+# Any number or date (every date pattern contains a digit)
+_NUM_RE = re.compile(r"\d")
+_SENT_RE = re.compile(r"[.;]")
+
+# Critical clause types that need clarity
+_CRITICAL_TYPES = frozenset(
+    {
+        "LIABILITY",
+        "INDEMNIFICATION",
+        "TERMINATION",
+        "PAYMENT",
+        "INTELLECTUAL_PROPERTY",
+    }
+)
+
+_HIGH_RISK_TYPES = frozenset(
+    {
+        "OBLIGATION",
+        "EXCLUSION",
+        "WARRANTY",
+        "CONFIDENTIALITY",
+        "DISPUTE_RESOLUTION",
+    }
+)
+
+# Interpretation guidance per clause type
+_TYPE_GUIDANCE = {
+    "PAYMENT": "Payment terms should specify exact amounts, dates, and conditions. ",
+    "TERMINATION": "Termination conditions should specify clear timelines and procedures. ",
+    "LIABILITY": "Liability limits should be explicitly stated with specific dollar amounts. ",
+    "OBLIGATION": "Obligations and exclusions should use clear, unambiguous language. ",
+    "EXCLUSION": "Obligations and exclusions should use clear, unambiguous language. ",
+}
 
 
 class AmbiguityDetector:
@@ -62,9 +97,34 @@ class AmbiguityDetector:
         "whereby",
     ]
 
+    # Negations (matched as whole words)
+    NEGATIONS = ["not", "no", "never", "neither", "nor"]
+
+    # Shared keyword automaton, built once when the class is defined
+    _AC = KeywordMatcher(
+        {
+            "AMBIGUOUS": AMBIGUOUS_TERMS,
+            "VAGUE": VAGUE_QUANTIFIERS,
+            "COMPLEX": COMPLEX_CONDITIONALS,
+            "NEGATION": NEGATIONS,
+        }
+    )
+
     def __init__(self, session: Session):
         self.session = session
 
+    def _scan_keywords(self, text: str) -> Dict[str, Set[str]]:
+        """Bucket keyword hits in one pass over the (lowercased) text"""
+        buckets = {category: set() for category in self._AC.keywords}
+        for start, end, category, term in self._AC.iter_matches(text):
+            if category == "NEGATION" and not (
+                (start == 0 or text[start - 1] == " ")
+                and (end == len(text) or text[end] == " ")
+            ):
+                continue
+            buckets[category].add(term)
+        return buckets
+
     def analyze_clause(self, clause: Clause) -> Tuple[bool, List[str], float]:
         """
         Analyze a clause for ambiguity
@@ -76,29 +136,36 @@ class AmbiguityDetector:
         issues = []
         score = 0.0
 
+        buckets = self._scan_keywords(text)
+
         # Check for ambiguous terms
-        found_ambiguous = [term for term in self.AMBIGUOUS_TERMS if term in text]
+        found_ambiguous = [
+            term for term in self.AMBIGUOUS_TERMS if term in buckets["AMBIGUOUS"]
+        ]
         if found_ambiguous:
             issues.append(f"Ambiguous terms: {', '.join(found_ambiguous)}")
             score += len(found_ambiguous) * 0.15
 
         # Check for vague quantifiers
-        found_vague = [term for term in self.VAGUE_QUANTIFIERS if term in text]
+        found_vague = [
+            term for term in self.VAGUE_QUANTIFIERS if term in buckets["VAGUE"]
+        ]
         if found_vague:
             issues.append(f"Vague quantifiers: {', '.join(found_vague)}")
             score += len(found_vague) * 0.1
 
         # Check for complex conditionals
-        found_complex = [term for term in self.COMPLEX_CONDITIONALS if term in text]
+        found_complex = [
+            term for term in self.COMPLEX_CONDITIONALS if term in buckets["COMPLEX"]
+        ]
         if found_complex:
             issues.append(f"Complex conditionals: {', '.join(found_complex)}")
             score += len(found_complex) * 0.12
 
         # Check for missing specifics (no numbers, dates, or concrete terms)
-        has_numbers = bool(re.search(r"\d+", text))
-        has_dates = bool(re.search(r"\d{1,2}/\d{1,2}/\d{2,4}|\d{4}-\d{2}-\d{2}", text))
+        has_specifics = _NUM_RE.search(text) is not None
 
-        if not has_numbers and not has_dates and len(text) > 100:
+        if not has_specifics and len(text) > 100:
             if clause.clause_type.value in ["PAYMENT", "TERMINATION", "LIABILITY"]:
                 issues.append(
                     "Lacks specific numbers or dates for critical clause type"
@@ -106,14 +173,13 @@ class AmbiguityDetector:
                 score += 0.25
 
         # Check for double negatives (confusing)
-        negations = ["not", "no", "never", "neither", "nor"]
-        negation_count = sum(1 for neg in negations if f" {neg} " in f" {text} ")
+        negation_count = len(buckets["NEGATION"])
         if negation_count >= 2:
             issues.append("Contains multiple negations (potentially confusing)")
             score += 0.2
 
         # Check sentence length and complexity
-        sentences = re.split(r"[.;]", clause.text)
+        sentences = _SENT_RE.split(clause.text)
         avg_length = sum(len(s.split()) for s in sentences) / max(len(sentences), 1)
 
         if avg_length > 40:
@@ -134,27 +200,10 @@ class AmbiguityDetector:
         Returns:
             RiskLevel enum value
         """
-        # Critical clause types that need clarity
-        critical_types = [
-            "LIABILITY",
-            "INDEMNIFICATION",
-            "TERMINATION",
-            "PAYMENT",
-            "INTELLECTUAL_PROPERTY",
-        ]
-
-        high_risk_types = [
-            "OBLIGATION",
-            "EXCLUSION",
-            "WARRANTY",
-            "CONFIDENTIALITY",
-            "DISPUTE_RESOLUTION",
-        ]
-
         clause_type = clause.clause_type.value
 
         # Base risk on ambiguity score
-        if clause_type in critical_types:
+        if clause_type in _CRITICAL_TYPES:
             if ambiguity_score > 0.6:
                 return RiskLevel.CRITICAL
             elif ambiguity_score > 0.3:
@@ -164,7 +213,7 @@ class AmbiguityDetector:
             else:
                 return RiskLevel.LOW
 
-        elif clause_type in high_risk_types:
+        elif clause_type in _HIGH_RISK_TYPES:
             if ambiguity_score > 0.7:
                 return RiskLevel.HIGH
             elif ambiguity_score > 0.4:
@@ -216,7 +265,8 @@ class AmbiguityDetector:
 
     def _generate_interpretation(self, clause: Clause, issues: List[str]) -> str:
         """Generate interpretation text for an ambiguous clause"""
-        interp = f"This {clause.clause_type.value.lower()} clause "
+        clause_type = clause.clause_type.value
+        interp = f"This {clause_type.lower()} clause "
 
         if len(issues) == 1:
             interp += "contains ambiguous language that "
@@ -226,20 +276,7 @@ class AmbiguityDetector:
         interp += "may lead to different interpretations. "
 
         # Add specific guidance based on clause type
-        if clause.clause_type.value == "PAYMENT":
-            interp += (
-                "Payment terms should specify exact amounts, dates, and conditions. "
-            )
-        elif clause.clause_type.value == "TERMINATION":
-            interp += (
-                "Termination conditions should specify clear timelines and procedures. "
-            )
-        elif clause.clause_type.value == "LIABILITY":
-            interp += "Liability limits should be explicitly stated with specific dollar amounts. "
-        elif clause.clause_type.value in ["OBLIGATION", "EXCLUSION"]:
-            interp += (
-                "Obligations and exclusions should use clear, unambiguous language. "
-            )
+        interp += _TYPE_GUIDANCE.get(clause_type, "")
 
         interp += "Legal review is recommended to clarify interpretation."
 
@@ -254,7 +291,12 @@ class AmbiguityDetector:
         """
         from models.database import Contract
 
-        contract = self.session.query(Contract).filter_by(id=contract_id).first()
+        contract = (
+            self.session.query(Contract)
+            .options(selectinload(Contract.clauses))
+            .filter_by(id=contract_id)
+            .first()
+        )
         if not contract:
             raise ValueError(f"Contract {contract_id} not found")
 
@@ -271,8 +313,9 @@ class AmbiguityDetector:
                 # Create interpretation
                 interpretation = self.create_interpretation(clause, issues, score)
                 interpretations.append(interpretation)
-                self.session.add(interpretation)
 
+        # Insert all interpretations in one batch
+        self.session.add_all(interpretations)
         self.session.commit()
 
         return interpretations
@@ -2,38 +2,239 @@
 Conflict detection across contract versions and amendments
 """
 
-import json
-import math
-from typing import List, Tuple, Dict
-from sqlalchemy.orm import Session
+import logging
+from typing import List, Tuple, Dict, Optional, Set, FrozenSet
 
-from models.database import Contract, Clause, Conflict, RiskLevel
+import numpy as np
+from sqlalchemy.orm import Session, selectinload
+
+# faiss is optional; without it similar pairs come from an exact matrix product.
+try:
+    import faiss  # type: ignore
+except ModuleNotFoundError:
+    faiss = None
+
+from models.database import Contract, Clause, Conflict, RiskLevel, contract_name_root
 from config import Config
+from utils.keyword_matcher import KeywordMatcher
+from utils.embeddings import decode_embedding
+
+logger = logging.getLogger(__name__)
+
+# Critical clause types
+_CRITICAL_TYPES = frozenset({"LIABILITY", "TERMINATION", "INDEMNIFICATION", "PAYMENT"})
 
 
 class ConflictDetector:
     """Detect conflicts between clauses across versions and amendments"""
 
+    # Negation indicators
+    NEGATIONS = ["not", "no", "never", "without", "except", "excluding"]
+    OBLIGATIONS = ["shall", "must", "will", "required"]
+    PROHIBITIONS = ["shall not", "must not", "prohibited", "forbidden"]
+
+    # Largest similarity error tolerated from int8 quantized scores
+    INT8_SLACK = 0.05
+
+    # Shared keyword automaton, built once when the class is defined
+    _AC = KeywordMatcher(
+        {
+            "NEGATION": NEGATIONS,
+            "OBLIGATION": OBLIGATIONS,
+            "PROHIBITION": PROHIBITIONS,
+        }
+    )
+
     def __init__(self, session: Session):
         self.session = session
         self.similarity_threshold = Config.SIMILARITY_THRESHOLD
         self.conflict_threshold = Config.CONFLICT_THRESHOLD
+        # Decoded, L2-normalized embeddings keyed by clause id
+        self._emb_cache: Dict[int, Optional[np.ndarray]] = {}
+        # (has_obligation, has_prohibition, negation_count) keyed by clause id
+        self._feature_cache: Dict[int, Tuple[bool, bool, int]] = {}
+        # Clause-id pairs already scored during this run
+        self._seen_pairs: Set[FrozenSet[int]] = set()
+
+    def _get_emb(self, clause: Clause) -> Optional[np.ndarray]:
+        """
+        Decode and L2-normalize a clause embedding, once per clause
+
+        Returns:
+            1-D float32 array, or None if the clause has no usable embedding
+        """
+        if clause.id in self._emb_cache:
+            return self._emb_cache[clause.id]
+
+        arr = decode_embedding(
+            clause.embedding_bytes, clause.embedding_vector, clause.embedding_scale
+        )
+        if arr is not None:
+            arr = arr / (np.linalg.norm(arr) or 1.0)
+
+        self._emb_cache[clause.id] = arr
+        return arr
+
+    def _embedding_matrix(
+        self, clauses: List[Clause]
+    ) -> Tuple[List[Clause], Optional[np.ndarray]]:
+        """
+        Stack the normalized embeddings of clauses that have one
+
+        Returns:
+            (clauses with embeddings, matrix with one row per clause); the
+            matrix is None when the embeddings do not share a dimension
+        """
+        embedded = []
+        vectors = []
+        for clause in clauses:
+            emb = self._get_emb(clause)
+            if emb is not None:
+                embedded.append(clause)
+                vectors.append(emb)
+
+        if not vectors or len({v.shape[0] for v in vectors}) != 1:
+            return embedded, None
+
+        return embedded, np.vstack(vectors)
+
+    def _similar_pairs(
+        self, left: np.ndarray, right: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, int]]:
+        """
+        Find row pairs whose similarity exceeds the similarity threshold
+
+        Args:
+            left: Normalized embeddings, one row per clause
+            right: Embeddings to compare against; if omitted, left is compared
+                with itself and only pairs with i < j are returned
+
+        Returns:
+            Sorted list of (left_index, right_index) pairs
+        """
+        same = right is None
+        if same:
+            right = left
+
+        if faiss is not None:
+            # Probe only the nearest neighbors of each clause
+            k = min(Config.CONFLICT_NEIGHBORS, right.shape[0])
+            left = np.ascontiguousarray(left)
+            right = np.ascontiguousarray(right)
+            quantized = right.shape[0] >= Config.CONFLICT_INT8_MIN_CLAUSES
+            if quantized:
+                # int8 codes cut memory traffic 4x; survivors are re-scored in fp32
+                index = faiss.IndexScalarQuantizer(
+                    right.shape[1],
+                    faiss.ScalarQuantizer.QT_8bit,
+                    faiss.METRIC_INNER_PRODUCT,
+                )
+                index.train(right)
+                cutoff = self.similarity_threshold - self.INT8_SLACK
+            else:
+                index = faiss.IndexFlatIP(right.shape[1])
+                cutoff = self.similarity_threshold
+            index.add(right)
+            scores, neighbors = index.search(left, k)
+
+            pairs = set()
+            for i, (row_scores, row_neighbors) in enumerate(zip(scores, neighbors)):
+                for score, j in zip(row_scores.tolist(), row_neighbors.tolist()):
+                    if j < 0 or score <= cutoff:
+                        continue
+                    exact = float(left[i] @ right[j]) if quantized else score
+                    if exact <= self.similarity_threshold:
+                        continue
+                    if not same:
+                        pairs.add((i, j))
+                    elif i != j:
+                        pairs.add((min(i, j), max(i, j)))
+            return sorted(pairs)
+
+        # One matrix product gives every pairwise similarity
+        mask = (left @ right.T) > self.similarity_threshold
+        if same:
+            mask = np.triu(mask, k=1)
+        rows, cols = np.nonzero(mask)
+        return list(zip(rows.tolist(), cols.tolist()))
+
+    def _similar_pairs_deduped(self, matrix: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        Like _similar_pairs(matrix), but search each distinct embedding once
+
+        Clauses copied verbatim share an embedding; only one representative
+        per distinct row is searched and matches are expanded to all members.
+        """
+        groups: Dict[bytes, List[int]] = {}
+        for i, row in enumerate(matrix):
+            groups.setdefault(row.tobytes(), []).append(i)
+
+        if len(groups) == len(matrix):
+            return self._similar_pairs(matrix)
+
+        members = list(groups.values())
+        unique = matrix[[group[0] for group in members]]
+
+        pairs = []
+        for group, row in zip(members, unique):
+            # Identical rows are similar to each other unless the vector is zero
+            if len(group) > 1 and float(row @ row) > self.similarity_threshold:
+                pairs.extend(
+                    (group[a], group[b])
+                    for a in range(len(group))
+                    for b in range(a + 1, len(group))
+                )
+        for a, b in self._similar_pairs(unique):
+            pairs.extend((min(i, j), max(i, j)) for i in members[a] for j in members[b])
+
+        pairs.sort()
+        return pairs
+
+    def _contradicting_pairs(
+        self,
+        pairs: List[Tuple[int, int]],
+        left: List[Clause],
+        right: List[Clause],
+    ) -> List[Tuple[int, int]]:
+        """
+        Keep only the pairs whose contradiction score can exceed the
+        conflict threshold, scored for all pairs at once
+
+        Args:
+            pairs: (left_index, right_index) candidate pairs
+            left: Clauses indexed by the first element of each pair
+            right: Clauses indexed by the second element of each pair
+        """
+        if not pairs:
+            return pairs
+
+        left_features = np.array(
+            [self._clause_features(c) for c in left], dtype=np.int32
+        ).reshape(-1, 3)
+        right_features = np.array(
+            [self._clause_features(c) for c in right], dtype=np.int32
+        ).reshape(-1, 3)
+        index = np.array(pairs, dtype=np.intp)
+        f1 = left_features[index[:, 0]]
+        f2 = right_features[index[:, 1]]
+
+        # Same rules as _score_contradiction
+        opposing = (f1[:, 0] & f2[:, 1]) | (f1[:, 1] & f2[:, 0])
+        negation_gap = np.abs(f1[:, 2] - f2[:, 2]) >= 2
+        scores = np.minimum(0.7 * opposing + 0.3 * negation_gap, 1.0)
+
+        keep = np.nonzero(scores > self.conflict_threshold)[0]
+        return [pairs[k] for k in keep.tolist()]
 
     @staticmethod
-    def _cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
-        """Cosine similarity for same-length numeric vectors."""
-        if not vec1 or not vec2 or len(vec1) != len(vec2):
-            return 0.0
-        dot = 0.0
-        n1 = 0.0
-        n2 = 0.0
-        for a, b in zip(vec1, vec2):
-            dot += a * b
-            n1 += a * a
-            n2 += b * b
-        if n1 <= 0.0 or n2 <= 0.0:
-            return 0.0
-        return dot / math.sqrt(n1 * n2)
+    def _group_by_type(clauses: List[Clause]) -> Dict:
+        """Group clauses by clause type, preserving document order"""
+        clauses_by_type = {}
+        for clause in clauses:
+            if clause.clause_type not in clauses_by_type:
+                clauses_by_type[clause.clause_type] = []
+            clauses_by_type[clause.clause_type].append(clause)
+        return clauses_by_type
 
     def detect_conflicts(self, contract_id: int) -> List[Conflict]:
         """
@@ -45,32 +246,46 @@ class ConflictDetector:
         Returns:
             List of detected Conflict objects
         """
-        contract = self.session.query(Contract).filter_by(id=contract_id).first()
+        contract = (
+            self.session.query(Contract)
+            .options(
+                selectinload(Contract.clauses),
+                selectinload(Contract.parent_contract).selectinload(Contract.clauses),
+            )
+            .filter_by(id=contract_id)
+            .first()
+        )
         if not contract:
             raise ValueError(f"Contract {contract_id} not found")
 
         conflicts = []
 
+        # Decode each clause embedding, and scan each clause text, at most
+        # once per run
+        self._emb_cache = {}
+        self._feature_cache = {}
+        self._seen_pairs = set()
+
         # 1. Detect internal contradictions
-        print("Detecting internal contradictions...")
+        logger.debug("Detecting internal contradictions for contract %s", contract_id)
         internal_conflicts = self._detect_internal_conflicts(contract)
         conflicts.extend(internal_conflicts)
 
         # 2. If this is an amendment, check against parent contract
         if contract.is_amendment and contract.parent_contract_id:
-            print("Detecting conflicts with parent contract...")
+            logger.debug(
+                "Detecting conflicts with parent contract for contract %s", contract_id
+            )
             parent_conflicts = self._detect_parent_conflicts(contract)
             conflicts.extend(parent_conflicts)
 
         # 3. Check against other versions of the same contract
-        print("Detecting version conflicts...")
+        logger.debug("Detecting version conflicts for contract %s", contract_id)
         version_conflicts = self._detect_version_conflicts(contract)
         conflicts.extend(version_conflicts)
 
-        # Save all conflicts
-        for conflict in conflicts:
-            self.session.add(conflict)
-
+        # Save all conflicts in one batch
+        self.session.add_all(conflicts)
         self.session.commit()
 
         return conflicts
@@ -78,22 +293,32 @@ class ConflictDetector:
     def _detect_internal_conflicts(self, contract: Contract) -> List[Conflict]:
         """Detect contradictions within the same contract"""
         conflicts = []
-        clauses = contract.clauses
 
         # Group clauses by type for more efficient comparison
-        clauses_by_type = {}
-        for clause in clauses:
-            if clause.clause_type not in clauses_by_type:
-                clauses_by_type[clause.clause_type] = []
-            clauses_by_type[clause.clause_type].append(clause)
+        clauses_by_type = self._group_by_type(contract.clauses)
 
         # Compare clauses within each type
         for clause_type, type_clauses in clauses_by_type.items():
-            for i, clause1 in enumerate(type_clauses):
-                for clause2 in type_clauses[i + 1 :]:
-                    conflict = self._check_clause_conflict(clause1, clause2)
-                    if conflict:
-                        conflicts.append(conflict)
+            embedded, matrix = self._embedding_matrix(type_clauses)
+
+            if matrix is None:
+                # Mixed embedding sizes: fall back to pairwise comparison
+                for i, clause1 in enumerate(embedded):
+                    for clause2 in embedded[i + 1 :]:
+                        conflict = self._check_clause_conflict(clause1, clause2)
+                        if conflict:
+                            conflicts.append(conflict)
+                continue
+
+            pairs = self._contradicting_pairs(
+                self._similar_pairs_deduped(matrix), embedded, embedded
+            )
+            for i, j in pairs:
+                conflict = self._conflict_from_similarity(
+                    embedded[i], embedded[j], "CONTRADICTION"
+                )
+                if conflict:
+                    conflicts.append(conflict)
 
         return conflicts
 
@@ -108,21 +333,34 @@ class ConflictDetector:
         amendment_clauses = amendment.clauses
         parent_clauses = parent.clauses
 
+        # Index parent clauses by type and by top-level section
+        position = {id(c): i for i, c in enumerate(parent_clauses)}
+        parent_by_type = self._group_by_type(parent_clauses)
+        parent_by_root = {}
+        for parent_clause in parent_clauses:
+            if parent_clause.section_number:
+                root = self._section_root(parent_clause.section_number)
+                parent_by_root.setdefault(root, []).append(parent_clause)
+
         # Compare amendment clauses with parent clauses
         for amend_clause in amendment_clauses:
-            for parent_clause in parent_clauses:
-                # Only compare clauses of similar types or related sections
-                if (
-                    amend_clause.clause_type == parent_clause.clause_type
-                    or self._sections_related(
-                        amend_clause.section_number, parent_clause.section_number
-                    )
-                ):
-                    conflict = self._check_clause_conflict(
-                        amend_clause, parent_clause, conflict_type="OVERRIDE"
-                    )
-                    if conflict:
-                        conflicts.append(conflict)
+            # Only compare clauses of similar types or related sections
+            candidates = list(parent_by_type.get(amend_clause.clause_type, []))
+            if amend_clause.section_number:
+                root = self._section_root(amend_clause.section_number)
+                candidates.extend(
+                    c
+                    for c in parent_by_root.get(root, [])
+                    if c.clause_type != amend_clause.clause_type
+                )
+                candidates.sort(key=lambda c: position[id(c)])
+
+            for parent_clause in candidates:
+                conflict = self._check_clause_conflict(
+                    amend_clause, parent_clause, conflict_type="OVERRIDE"
+                )
+                if conflict:
+                    conflicts.append(conflict)
 
         return conflicts
 
@@ -130,27 +368,74 @@ class ConflictDetector:
         """Detect conflicts across different versions"""
         conflicts = []
 
-        # Find other versions of the same contract (by name similarity)
+        # Find other versions of the same contract (same first word of the name)
+        name_root = contract_name_root(contract.name)
+        if not name_root:
+            return conflicts
+
         other_contracts = (
             self.session.query(Contract)
-            .filter(
-                Contract.id != contract.id,
-                Contract.name.contains(
-                    contract.name.split()[0]
-                ),  # Simple name matching
-            )
+            .options(selectinload(Contract.clauses))
+            .filter(Contract.id != contract.id, Contract.name_root == name_root)
             .all()
         )
 
+        clauses_by_type = self._group_by_type(contract.clauses)
+
         for other_contract in other_contracts:
-            for clause1 in contract.clauses:
-                for clause2 in other_contract.clauses:
-                    if clause1.clause_type == clause2.clause_type:
-                        conflict = self._check_clause_conflict(
-                            clause1, clause2, conflict_type="VERSION_CONFLICT"
-                        )
-                        if conflict:
-                            conflicts.append(conflict)
+            other_by_type = self._group_by_type(other_contract.clauses)
+            candidates = []
+
+            for clause_type, type_clauses in clauses_by_type.items():
+                if clause_type not in other_by_type:
+                    continue
+                embedded, matrix = self._embedding_matrix(type_clauses)
+                other_embedded, other_matrix = self._embedding_matrix(
+                    other_by_type[clause_type]
+                )
+                if not embedded or not other_embedded:
+                    continue
+
+                if (
+                    matrix is None
+                    or other_matrix is None
+                    or matrix.shape[1] != other_matrix.shape[1]
+                ):
+                    # Mixed embedding sizes: fall back to pairwise comparison
+                    candidates.extend(
+                        (clause1, clause2, False)
+                        for clause1 in embedded
+                        for clause2 in other_embedded
+                    )
+                    continue
+
+                pairs = self._contradicting_pairs(
+                    self._similar_pairs(matrix, other_matrix),
+                    embedded,
+                    other_embedded,
+                )
+                candidates.extend(
+                    (embedded[i], other_embedded[j], True) for i, j in pairs
+                )
+
+            # Report in document order of both contracts
+            position = {id(c): i for i, c in enumerate(contract.clauses)}
+            other_position = {id(c): i for i, c in enumerate(other_contract.clauses)}
+            candidates.sort(
+                key=lambda c: (position[id(c[0])], other_position[id(c[1])])
+            )
+
+            for clause1, clause2, is_similar in candidates:
+                if is_similar:
+                    conflict = self._conflict_from_similarity(
+                        clause1, clause2, "VERSION_CONFLICT"
+                    )
+                else:
+                    conflict = self._check_clause_conflict(
+                        clause1, clause2, conflict_type="VERSION_CONFLICT"
+                    )
+                if conflict:
+                    conflicts.append(conflict)
 
         return conflicts
 
@@ -163,52 +448,73 @@ class ConflictDetector:
         Returns:
             Conflict object if conflict detected, None otherwise
         """
-        # Get embeddings
-        emb1 = (
-            json.loads(clause1.embedding_vector) if clause1.embedding_vector else None
-        )
-        emb2 = (
-            json.loads(clause2.embedding_vector) if clause2.embedding_vector else None
-        )
+        # Skip pairs without embeddings before decoding anything
+        if not (clause1.embedding_bytes or clause1.embedding_vector) or not (
+            clause2.embedding_bytes or clause2.embedding_vector
+        ):
+            return None
 
-        if not emb1 or not emb2:
+        # Skip pairs already scored through another path
+        if frozenset((clause1.id, clause2.id)) in self._seen_pairs:
             return None
 
-        # Calculate semantic similarity
-        try:
-            similarity = self._cosine_similarity(
-                list(map(float, emb1)),
-                list(map(float, emb2)),
-            )
-        except (TypeError, ValueError):
-            similarity = 0.0
+        # Get embeddings (decoded once per clause per run)
+        emb1 = self._get_emb(clause1)
+        emb2 = self._get_emb(clause2)
+
+        if emb1 is None or emb2 is None:
+            return None
+
+        # Calculate semantic similarity (embeddings are pre-normalized)
+        similarity = float(emb1 @ emb2) if emb1.shape == emb2.shape else 0.0
 
         # High similarity + different implications = potential conflict
         # This is a simplified heuristic
         if similarity > self.similarity_threshold:
-            # Check for contradictory terms
-            contradiction_score = self._check_contradiction(clause1.text, clause2.text)
+            return self._conflict_from_similarity(clause1, clause2, conflict_type)
 
-            if contradiction_score > self.conflict_threshold:
-                # Determine severity based on clause types
-                severity = self._assess_conflict_severity(
-                    clause1.clause_type, contradiction_score
-                )
+        return None
 
-                description = self._generate_conflict_description(
-                    clause1, clause2, conflict_type, contradiction_score
-                )
+    def _conflict_from_similarity(
+        self, clause1: Clause, clause2: Clause, conflict_type: str
+    ) -> Optional[Conflict]:
+        """
+        Score two clauses already known to be semantically similar
 
-                conflict = Conflict(
-                    clause_id=clause1.id,
-                    conflicting_clause_id=clause2.id,
-                    conflict_type=conflict_type,
-                    description=description,
-                    severity=severity,
-                    confidence_score=contradiction_score,
-                )
+        Returns:
+            Conflict object if conflict detected, None otherwise
+        """
+        # Score each unordered pair at most once per run
+        key = frozenset((clause1.id, clause2.id))
+        if key in self._seen_pairs:
+            return None
+        self._seen_pairs.add(key)
+
+        # Check for contradictory terms
+        contradiction_score = self._score_contradiction(
+            self._clause_features(clause1), self._clause_features(clause2)
+        )
+
+        if contradiction_score > self.conflict_threshold:
+            # Determine severity based on clause types
+            severity = self._assess_conflict_severity(
+                clause1.clause_type, contradiction_score
+            )
+
+            description = self._generate_conflict_description(
+                clause1, clause2, conflict_type, contradiction_score
+            )
+
+            conflict = Conflict(
+                clause_id=clause1.id,
+                conflicting_clause_id=clause2.id,
+                conflict_type=conflict_type,
+                description=description,
+                severity=severity,
+                confidence_score=contradiction_score,
+            )
 
-                return conflict
+            return conflict
 
         return None
 
@@ -219,21 +525,42 @@ class ConflictDetector:
         Returns:
             Score from 0.0 to 1.0 indicating contradiction level
         """
-        # Negation indicators
-        negations = ["not", "no", "never", "without", "except", "excluding"]
-        obligations = ["shall", "must", "will", "required"]
-        prohibitions = ["shall not", "must not", "prohibited", "forbidden"]
+        return self._score_contradiction(
+            self._contradiction_features(text1), self._contradiction_features(text2)
+        )
 
-        text1_lower = text1.lower()
-        text2_lower = text2.lower()
+    def _clause_features(self, clause: Clause) -> Tuple[bool, bool, int]:
+        """Contradiction features of a clause, scanned once per clause"""
+        features = self._feature_cache.get(clause.id)
+        if features is None:
+            features = self._contradiction_features(clause.text)
+            self._feature_cache[clause.id] = features
+        return features
 
-        score = 0.0
+    def _contradiction_features(self, text: str) -> Tuple[bool, bool, int]:
+        """
+        Scan a text once for contradiction indicators
+
+        Returns:
+            (has_obligation, has_prohibition, negation_count)
+        """
+        # Lowercased once per clause (see _clause_features), never per pair
+        hits = self._AC.find((text or "").lower())
+        return (
+            bool(hits["OBLIGATION"]),
+            bool(hits["PROHIBITION"]),
+            len(hits["NEGATION"]),
+        )
 
-        # Check for opposing obligations
-        has_obligation_1 = any(obl in text1_lower for obl in obligations)
-        has_prohibition_1 = any(proh in text1_lower for proh in prohibitions)
-        has_obligation_2 = any(obl in text2_lower for obl in obligations)
-        has_prohibition_2 = any(proh in text2_lower for proh in prohibitions)
+    @staticmethod
+    def _score_contradiction(
+        features1: Tuple[bool, bool, int], features2: Tuple[bool, bool, int]
+    ) -> float:
+        """Score the contradiction between two feature tuples (0.0 to 1.0)"""
+        has_obligation_1, has_prohibition_1, negation_count_1 = features1
+        has_obligation_2, has_prohibition_2, negation_count_2 = features2
+
+        score = 0.0
 
         # Obligation vs Prohibition
         if (has_obligation_1 and has_prohibition_2) or (
@@ -242,33 +569,22 @@ class ConflictDetector:
             score += 0.7
 
         # Check for negation differences
-        negation_count_1 = sum(1 for neg in negations if neg in text1_lower)
-        negation_count_2 = sum(1 for neg in negations if neg in text2_lower)
-
         if abs(negation_count_1 - negation_count_2) >= 2:
             score += 0.3
 
         return min(score, 1.0)
 
-    def _sections_related(self, section1: str, section2: str) -> bool:
-        """Check if two section numbers are related"""
-        if not section1 or not section2:
-            return False
-
-        # Simple check: same top-level section
-        parts1 = section1.split(".")
-        parts2 = section2.split(".")
-
-        return parts1[0] == parts2[0] if parts1 and parts2 else False
+    @staticmethod
+    def _section_root(section: str) -> str:
+        """Top-level part of a section number ("5" for "5.2.1")"""
+        dot = section.find(".")
+        return section if dot < 0 else section[:dot]
 
     def _assess_conflict_severity(
         self, clause_type, contradiction_score: float
     ) -> RiskLevel:
         """Assess the severity of a conflict"""
-        # Critical clause types
-        critical_types = ["LIABILITY", "TERMINATION", "INDEMNIFICATION", "PAYMENT"]
-
-        if clause_type.value in critical_types:
+        if clause_type.value in _CRITICAL_TYPES:
             if contradiction_score > 0.7:
                 return RiskLevel.CRITICAL
             else:
@@ -3,15 +3,20 @@ Main Flask API Application - Vercel Optimized
 """
 
 import os
+import re
+import threading
+import time
 from flask import (
     Flask,
+    Response,
     request,
     jsonify,
-    send_file,
     render_template,
     redirect,
     url_for,
     flash,
+    send_file,
+    stream_with_context,
 )
 from flask_cors import CORS
 from flask_login import (
@@ -22,21 +27,33 @@ from flask_login import (
     current_user,
 )
 from werkzeug.utils import secure_filename
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from sqlalchemy import and_, case, func, literal, or_, select, union_all
+from sqlalchemy.orm import selectinload
+
+# Flask-Compress is optional; responses are sent uncompressed without it.
+try:
+    from flask_compress import Compress  # type: ignore
+except ModuleNotFoundError:
+    Compress = None
+
+# cdifflib is optional; it is a C drop-in for difflib's SequenceMatcher.
+try:
+    from cdifflib import CSequenceMatcher as SequenceMatcher  # type: ignore
+except ModuleNotFoundError:
+    from difflib import SequenceMatcher
 
 from config import Config
-from models.database import init_db, get_session, User, Contract
+from utils.storage import store_upload
+from utils.json_provider import OrjsonProvider, orjson
+from utils.passwords import hash_password, verify_password, needs_rehash
+from models.database import init_db, get_session, User, Contract, ClauseType
 from models.schemas import (
     QuestionRequest,
     ReviewSubmissionRequest,
     AuditReportRequest,
 )
-from extractors import ClauseExtractor
-from analyzers import ConflictDetector, AmbiguityDetector
-from qa_system import QuestionAnsweringSystem
-from workflows import ReviewWorkflow
-from reports import AuditReportGenerator
 
 # Initialize Flask app
 app = Flask(__name__, static_folder="static", static_url_path="/static")
@@ -44,6 +61,12 @@ app.config.from_object(Config)
 app.secret_key = Config.SECRET_KEY  # Ensure secret key is explicitly set
 CORS(app)
 
+# Faster JSON encoding and gzip/brotli responses when the optional packages exist
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+if Compress is not None:
+    Compress(app)
+
 # Initialize directories
 Config.init_directories()
 
@@ -64,17 +87,47 @@ login_manager.init_app(app)
 login_manager.login_view = "login"
 
 
+# Recently loaded users: user_id -> (expires_at, User), shared across requests.
+# flask-login already caches the user within a single request.
+_user_cache = {}
+_user_cache_lock = threading.Lock()
+
+
 @login_manager.user_loader
 def load_user(user_id):
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    now = time.monotonic()
+    with _user_cache_lock:
+        cached = _user_cache.get(user_id)
+    if cached and cached[0] > now:
+        return cached[1]
+
     session = get_session(engine)
     try:
         # Use session.get for SQLAlchemy 2.0+ compatibility
-        return session.get(User, int(user_id))
+        user = session.get(User, user_id)
     except Exception:
         return None
     finally:
         session.close()
 
+    if user is not None and Config.USER_CACHE_TTL > 0:
+        with _user_cache_lock:
+            if len(_user_cache) >= Config.USER_CACHE_SIZE:
+                _user_cache.clear()
+            _user_cache[user_id] = (now + Config.USER_CACHE_TTL, user)
+    return user
+
+
+def _forget_user(user_id):
+    """Drop a user from the loader cache"""
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
 
 @app.route("/login", methods=["GET", "POST"])
 def login():
@@ -84,7 +137,12 @@ def login():
         session = get_session(engine)
         try:
             user = session.query(User).filter_by(username=username).first()
-            if user and check_password_hash(user.password_hash, password):
+            if user and verify_password(user.password_hash, password):
+                if needs_rehash(user.password_hash):
+                    # Upgrade legacy hashes while the plaintext is at hand
+                    user.password_hash = hash_password(password)
+                    session.commit()
+                    _forget_user(user.id)
                 login_user(user)
                 return redirect(url_for("home"))
             else:
@@ -109,7 +167,7 @@ def register():
                 user = User(
                     username=username,
                     email=email,
-                    password_hash=generate_password_hash(password),
+                    password_hash=hash_password(password),
                 )
                 session.add(user)
                 session.commit()
@@ -122,6 +180,7 @@ def register():
 @app.route("/logout")
 @login_required
 def logout():
+    _forget_user(current_user.id)
     logout_user()
     return redirect(url_for("login"))
 
@@ -139,6 +198,136 @@ def health_check():
     return jsonify({"status": "healthy", "timestamp": datetime.utcnow().isoformat()})
 
 
+def _conditional_json(payload):
+    """
+    JSON response tagged with an ETag of its body
+
+    Clients that send a matching If-None-Match get an empty 304 instead.
+    """
+    response = jsonify(payload)
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+# One extractor (and its loaded NLP models) shared by every upload
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def _get_extractor():
+    """Create the shared ClauseExtractor on first use"""
+    global _extractor
+    if _extractor is None:
+        with _extractor_lock:
+            if _extractor is None:
+                from extractors import ClauseExtractor
+
+                _extractor = ClauseExtractor()
+    return _extractor
+
+
+def _process_contract(session, contract: Contract, file_path: str) -> dict:
+    """Extract clauses, then run ambiguity and conflict analysis"""
+    from analyzers import ConflictDetector, AmbiguityDetector
+
+    # Extract clauses
+    extractor = _get_extractor()
+    start_time = datetime.utcnow()
+    extractor.extract_from_contract(contract, file_path, session)
+    extraction_time = (datetime.utcnow() - start_time).total_seconds()
+
+    # Analyze for ambiguities
+    ambiguity_detector = AmbiguityDetector(session)
+    ambiguity_detector.analyze_all_clauses(contract.id)
+
+    # Detect conflicts
+    conflict_detector = ConflictDetector(session)
+    conflicts = conflict_detector.detect_conflicts(contract.id)
+
+    # Get clause statistics
+    from models.database import Clause, RiskLevel
+
+    rows = session.execute(
+        select(Clause.clause_type, Clause.risk_level, func.count())
+        .where(Clause.contract_id == contract.id)
+        .group_by(Clause.clause_type, Clause.risk_level)
+    ).all()
+
+    clauses_by_type = {}
+    high_risk_count = 0
+    total_clauses = 0
+
+    for clause_type, risk_level, count in rows:
+        clauses_by_type[clause_type.value] = (
+            clauses_by_type.get(clause_type.value, 0) + count
+        )
+        if risk_level in (RiskLevel.HIGH, RiskLevel.CRITICAL):
+            high_risk_count += count
+        total_clauses += count
+
+    contract.processing_status = "COMPLETED"
+    session.commit()
+
+    return {
+        "contract_id": contract.id,
+        "name": contract.name,
+        "version": contract.version,
+        "total_clauses": total_clauses,
+        "clauses_by_type": clauses_by_type,
+        "high_risk_count": high_risk_count,
+        "conflicts_detected": len(conflicts),
+        "extraction_time": extraction_time,
+        "status": contract.processing_status,
+    }
+
+
+def _mark_processing_failed(session, contract_id: int):
+    """Roll back a failed analysis and record it, so status polls end"""
+    session.rollback()
+    contract = session.get(Contract, contract_id)
+    if contract:
+        contract.processing_status = "FAILED"
+        session.commit()
+
+
+def _process_contract_job(contract_id: int, file_path: str):
+    """Background task: process an uploaded contract in its own session"""
+    session = get_session(engine)
+    try:
+        contract = session.get(Contract, contract_id)
+        if contract:
+            _process_contract(session, contract, file_path)
+    except Exception as e:
+        print(f"Processing contract {contract_id} failed: {e}")
+        _mark_processing_failed(session, contract_id)
+    finally:
+        session.close()
+
+
+def _init_processing_worker():
+    """Process pool initializer: load the NLP models once per child"""
+    # Connections inherited from the parent must not be shared
+    engine.dispose(close=False)
+    _get_extractor().warmup()
+
+
+def _create_processing_executor():
+    """Pool for background contract analysis, or None to process uploads inline"""
+    if not Config.ASYNC_PROCESSING:
+        return None
+    if Config.PROCESSING_POOL == "process":
+        # Worker processes each hold their own models, so extraction in one
+        # upload does not contend with another for the GIL
+        return ProcessPoolExecutor(
+            max_workers=Config.PROCESSING_WORKERS,
+            initializer=_init_processing_worker,
+        )
+    return ThreadPoolExecutor(max_workers=Config.PROCESSING_WORKERS)
+
+
+_processing_executor = _create_processing_executor()
+
+
 @app.route("/api/contracts/upload", methods=["POST"])
 @login_required
 def upload_contract():
@@ -161,10 +350,14 @@ def upload_contract():
     is_amendment = request.form.get("is_amendment", "false").lower() == "true"
     parent_contract_id = request.form.get("parent_contract_id", None)
 
-    # Save file
+    # Save file under its content hash; identical uploads share one copy
     filename = secure_filename(file.filename)
-    file_path = os.path.join(Config.UPLOAD_FOLDER, filename)
-    file.save(file_path)
+    file_path, _ = store_upload(
+        file.stream,
+        Config.UPLOAD_FOLDER,
+        os.path.splitext(filename)[1],
+        chunk_size=Config.UPLOAD_BUFFER_SIZE,
+    )
 
     # Create contract in database
     session = get_session(engine)
@@ -177,44 +370,31 @@ def upload_contract():
             version=version,
             is_amendment=is_amendment,
             parent_contract_id=int(parent_contract_id) if parent_contract_id else None,
+            processing_status="PROCESSING",
         )
         session.add(contract)
         session.commit()
 
-        # Extract clauses
-        extractor = ClauseExtractor()
-        start_time = datetime.utcnow()
-        clauses = extractor.extract_from_contract(contract, file_path, session)
-        extraction_time = (datetime.utcnow() - start_time).total_seconds()
-
-        # Analyze for ambiguities
-        ambiguity_detector = AmbiguityDetector(session)
-        ambiguity_detector.analyze_all_clauses(contract.id)
-
-        # Detect conflicts
-        conflict_detector = ConflictDetector(session)
-        conflicts = conflict_detector.detect_conflicts(contract.id)
-
-        # Get clause statistics
-        clauses_by_type = {}
-        high_risk_count = 0
-
-        for clause in clauses:
-            clause_type = clause.clause_type.value
-            clauses_by_type[clause_type] = clauses_by_type.get(clause_type, 0) + 1
-            if clause.risk_level.value in ["HIGH", "CRITICAL"]:
-                high_risk_count += 1
+        if _processing_executor is not None:
+            # Analyze in the background; clients poll the status endpoint
+            _processing_executor.submit(_process_contract_job, contract.id, file_path)
+            return (
+                jsonify(
+                    {
+                        "contract_id": contract.id,
+                        "name": contract.name,
+                        "version": contract.version,
+                        "status": contract.processing_status,
+                    }
+                ),
+                202,
+            )
 
-        result = {
-            "contract_id": contract.id,
-            "name": contract.name,
-            "version": contract.version,
-            "total_clauses": len(clauses),
-            "clauses_by_type": clauses_by_type,
-            "high_risk_count": high_risk_count,
-            "conflicts_detected": len(conflicts),
-            "extraction_time": extraction_time,
-        }
+        try:
+            result = _process_contract(session, contract, file_path)
+        except Exception as e:
+            _mark_processing_failed(session, contract.id)
+            return jsonify({"error": str(e)}), 500
 
         return jsonify(result), 201
 
@@ -232,31 +412,50 @@ def list_contracts():
     session = get_session(engine)
 
     try:
-        contracts = session.query(Contract).all()
-
-        result = []
-        for contract in contracts:
-            high_risk_count = sum(
-                1
-                for clause in contract.clauses
-                if clause.risk_level.value in ["HIGH", "CRITICAL"]
-            )
+        from models.database import Clause, RiskLevel
 
-            result.append(
-                {
-                    "id": contract.id,
-                    "name": contract.name,
-                    "version": contract.version,
-                    "is_amendment": contract.is_amendment,
-                    "created_at": contract.created_at.isoformat()
-                    if contract.created_at
-                    else None,
-                    "clause_count": len(contract.clauses),
-                    "high_risk_clause_count": high_risk_count,
-                }
+        # Clause counts are aggregated in SQL instead of loading every clause
+        high_risk = case(
+            (Clause.risk_level.in_([RiskLevel.HIGH, RiskLevel.CRITICAL]), 1),
+            else_=0,
+        )
+        rows = session.execute(
+            select(
+                Contract.id,
+                Contract.name,
+                Contract.version,
+                Contract.is_amendment,
+                Contract.created_at,
+                func.count(Clause.id),
+                func.coalesce(func.sum(high_risk), 0),
             )
+            .outerjoin(Clause, Clause.contract_id == Contract.id)
+            .group_by(Contract.id)
+            .order_by(Contract.id)
+        ).all()
 
-        return jsonify(result), 200
+        result = [
+            {
+                "id": contract_id,
+                "name": name,
+                "version": version,
+                "is_amendment": is_amendment,
+                "created_at": created_at.isoformat() if created_at else None,
+                "clause_count": clause_count,
+                "high_risk_clause_count": high_risk_count,
+            }
+            for (
+                contract_id,
+                name,
+                version,
+                is_amendment,
+                created_at,
+                clause_count,
+                high_risk_count,
+            ) in rows
+        ]
+
+        return _conditional_json(result)
 
     finally:
         session.close()
@@ -269,7 +468,12 @@ def get_contract(contract_id):
     session = get_session(engine)
 
     try:
-        contract = session.query(Contract).filter_by(id=contract_id).first()
+        contract = (
+            session.query(Contract)
+            .options(selectinload(Contract.clauses))
+            .filter_by(id=contract_id)
+            .first()
+        )
 
         if not contract:
             return jsonify({"error": "Contract not found"}), 404
@@ -305,6 +509,27 @@ def get_contract(contract_id):
         session.close()
 
 
+@app.route("/api/contracts/<int:contract_id>/status", methods=["GET"])
+@login_required
+def get_contract_status(contract_id):
+    """Get the processing status of an uploaded contract"""
+    session = get_session(engine)
+
+    try:
+        contract = session.get(Contract, contract_id)
+
+        if not contract:
+            return jsonify({"error": "Contract not found"}), 404
+
+        return (
+            jsonify({"contract_id": contract.id, "status": contract.processing_status}),
+            200,
+        )
+
+    finally:
+        session.close()
+
+
 @app.route("/api/questions/ask", methods=["POST"])
 @login_required
 def ask_question():
@@ -324,6 +549,8 @@ def ask_question():
     session = get_session(engine)
 
     try:
+        from qa_system import QuestionAnsweringSystem
+
         qa_system = QuestionAnsweringSystem(session)
         answer = qa_system.answer_question(
             question=question_req.question,
@@ -383,6 +610,8 @@ def assign_review():
     session = get_session(engine)
 
     try:
+        from workflows import ReviewWorkflow
+
         workflow = ReviewWorkflow(session)
         review = workflow.assign_for_review(
             clause_id=data["clause_id"],
@@ -419,6 +648,8 @@ def submit_review():
     session = get_session(engine)
 
     try:
+        from workflows import ReviewWorkflow
+
         workflow = ReviewWorkflow(session)
         review = workflow.submit_review(
             review_id=review_req.clause_id,  # Using clause_id as review_id for simplicity
@@ -453,6 +684,8 @@ def get_pending_reviews():
     session = get_session(engine)
 
     try:
+        from workflows import ReviewWorkflow
+
         workflow = ReviewWorkflow(session)
         reviews = workflow.get_pending_reviews(reviewer_email)
 
@@ -462,6 +695,88 @@ def get_pending_reviews():
         session.close()
 
 
+def _build_report_job(report_id: int):
+    """Background task: write a requested report to REPORTS_FOLDER"""
+    from models.database import Report
+    from reports import AuditReportGenerator
+
+    session = get_session(engine)
+    try:
+        report = session.get(Report, report_id)
+        if not report:
+            return
+        report.status = "PROCESSING"
+        session.commit()
+
+        # Written while the session is open, so records can be streamed
+        generator = AuditReportGenerator(session)
+        stream = (
+            generator.stream_jsonl_report
+            if report.format == "jsonl"
+            else generator.stream_json_report
+        )
+        chunks = stream(
+            report.contract_id,
+            include_conflicts=report.include_conflicts,
+            include_reviews=report.include_reviews,
+        )
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        file_path = os.path.join(
+            Config.REPORTS_FOLDER,
+            f"contract_report_{report.contract_id}_{report.id}_{timestamp}"
+            f".{_report_format(report.format)}",
+        )
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.writelines(chunks)
+
+        report.file_path = file_path
+        report.status = "COMPLETED"
+        report.completed_at = datetime.utcnow()
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"Building report {report_id} failed: {e}")
+        report = session.get(Report, report_id)
+        if report:
+            report.status = "FAILED"
+            report.error_message = str(e)
+            session.commit()
+    finally:
+        session.close()
+
+
+# Reports get their own pool so a burst of them cannot starve upload processing
+_report_executor = (
+    ThreadPoolExecutor(max_workers=Config.REPORT_WORKERS)
+    if Config.ASYNC_PROCESSING
+    else None
+)
+
+
+# Report formats that can be produced -> download mimetype
+_REPORT_MIMETYPES = {"json": "application/json", "jsonl": "application/x-ndjson"}
+
+
+def _report_format(requested: str) -> str:
+    """Export format for a requested one; PDF and others get JSON"""
+    if requested == "ndjson":
+        return "jsonl"
+    return requested if requested in _REPORT_MIMETYPES else "json"
+
+
+def _report_status(report) -> dict:
+    """Status payload for a background report"""
+    return {
+        "report_id": report.id,
+        "contract_id": report.contract_id,
+        "status": report.status,
+        "error": report.error_message,
+        "download_url": url_for("download_report", report_id=report.id)
+        if report.status == "COMPLETED"
+        else None,
+    }
+
+
 @app.route("/api/reports/generate", methods=["POST"])
 @login_required
 def generate_report():
@@ -476,33 +791,117 @@ def generate_report():
     session = get_session(engine)
 
     try:
-        generator = AuditReportGenerator(session)
-
         # Generate report for first contract (can be extended for multiple)
         contract_id = report_req.contract_ids[0]
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        report_format = _report_format(report_req.format)
 
-        if report_req.format == "pdf":
-            output_path = os.path.join(
-                Config.REPORTS_FOLDER, f"contract_report_{contract_id}_{timestamp}.pdf"
-            )
-            generator.generate_contract_report(
+        if _report_executor is not None:
+            # Build in the background; clients poll the report endpoint
+            from models.database import Report
+
+            if not session.get(Contract, contract_id):
+                return jsonify({"error": f"Contract {contract_id} not found"}), 404
+
+            report = Report(
                 contract_id=contract_id,
-                output_path=output_path,
+                format=report_format,
                 include_conflicts=report_req.include_conflicts,
                 include_reviews=report_req.include_reviews,
-                include_decisions=report_req.include_decisions,
-            )
-        else:  # JSON
-            output_path = os.path.join(
-                Config.REPORTS_FOLDER, f"contract_report_{contract_id}_{timestamp}.json"
+                requested_by=getattr(current_user, "username", None),
             )
-            generator.export_to_json(contract_id, output_path)
+            session.add(report)
+            session.commit()
+
+            _report_executor.submit(_build_report_job, report.id)
+            return jsonify(_report_status(report)), 202
 
-        return send_file(output_path, as_attachment=True)
+        from reports import AuditReportGenerator
+
+        generator = AuditReportGenerator(session)
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+
+        # JSON and JSON Lines exports are available; PDF requests get the
+        # JSON report too. The report is streamed to the client instead of
+        # written to disk.
+        stream = (
+            generator.stream_jsonl_report
+            if report_format == "jsonl"
+            else generator.stream_json_report
+        )
+        # The header is read here, so a missing contract is still an error
+        # response; the records are read while the response is sent
+        chunks = stream(
+            contract_id,
+            include_conflicts=report_req.include_conflicts,
+            include_reviews=report_req.include_reviews,
+        )
+        filename = f"contract_report_{contract_id}_{timestamp}.{report_format}"
+
+        def generate(session=session):
+            # Owns the session from here on: closed once the response has
+            # been sent, or when the client disconnects
+            try:
+                yield from chunks
+            finally:
+                session.close()
+
+        response = Response(
+            stream_with_context(generate()),
+            mimetype=_REPORT_MIMETYPES[report_format],
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        )
+        session = None
+        return response
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    finally:
+        if session is not None:
+            session.close()
+
+
+@app.route("/api/reports/<int:report_id>", methods=["GET"])
+@login_required
+def get_report_status(report_id):
+    """Get the status of a background report"""
+    session = get_session(engine)
+
+    try:
+        from models.database import Report
+
+        report = session.get(Report, report_id)
+        if not report:
+            return jsonify({"error": "Report not found"}), 404
+
+        return jsonify(_report_status(report)), 200
+
+    finally:
+        session.close()
+
+
+@app.route("/api/reports/<int:report_id>/download", methods=["GET"])
+@login_required
+def download_report(report_id):
+    """Download a finished background report"""
+    session = get_session(engine)
+
+    try:
+        from models.database import Report
+
+        report = session.get(Report, report_id)
+        if not report:
+            return jsonify({"error": "Report not found"}), 404
+        if report.status != "COMPLETED":
+            # Not ready (or failed): report the status instead of the file
+            return jsonify(_report_status(report)), 409
+
+        return send_file(
+            report.file_path,
+            mimetype=_REPORT_MIMETYPES[_report_format(report.format or "json")],
+            as_attachment=True,
+            download_name=os.path.basename(report.file_path),
+        )
+
     finally:
         session.close()
 
@@ -514,6 +913,8 @@ def get_workflow_status(contract_id):
     session = get_session(engine)
 
     try:
+        from workflows import ReviewWorkflow
+
         workflow = ReviewWorkflow(session)
         status = workflow.get_workflow_status(contract_id)
 
@@ -531,24 +932,65 @@ def get_contract_history(contract_id):
     """Get the amendment history/lineage of a contract"""
     session = get_session(engine)
     try:
-        current = session.query(Contract).filter_by(id=contract_id).first()
-        if not current:
+        from models.database import Clause
+
+        # Walk up to the root contract (the original) in one recursive query;
+        # UNION stops on parent cycles
+        ancestors = (
+            select(Contract.id, Contract.parent_contract_id)
+            .where(Contract.id == contract_id)
+            .cte("ancestors", recursive=True)
+        )
+        ancestors = ancestors.union(
+            select(Contract.id, Contract.parent_contract_id).join(
+                ancestors, Contract.id == ancestors.c.parent_contract_id
+            )
+        )
+        chain = session.execute(select(ancestors)).all()
+        if not chain:
             return jsonify({"error": "Contract not found"}), 404
+        root_id = next(
+            (row.id for row in chain if row.parent_contract_id is None), contract_id
+        )
 
-        # Find the root contract (the original)
-        root = current
-        while root.parent_contract_id:
-            parent = (
-                session.query(Contract).filter_by(id=root.parent_contract_id).first()
+        # Fetch the whole lineage below the root, with clause counts
+        lineage = (
+            select(Contract.id)
+            .where(Contract.id == root_id)
+            .cte("lineage", recursive=True)
+        )
+        lineage = lineage.union(
+            select(Contract.id).join(
+                lineage, Contract.parent_contract_id == lineage.c.id
             )
-            if not parent or parent.id == root.id:  # Prevent infinite cycles
-                break
-            root = parent
-
-        # Traverse down from root to find all amendments in order
+        )
+        clause_count = (
+            select(func.count(Clause.id))
+            .where(Clause.contract_id == Contract.id)
+            .scalar_subquery()
+        )
+        rows = session.execute(
+            select(Contract, clause_count)
+            .join(lineage, Contract.id == lineage.c.id)
+            .order_by(Contract.id)
+        ).all()
+
+        children = {}
+        nodes = {}
+        for node, count in rows:
+            nodes[node.id] = (node, count)
+            children.setdefault(node.parent_contract_id, []).append(node.id)
+
+        # Depth-first from the root, amendments in id order
         history = []
-
-        def traverse(node):
+        visited = set()
+        stack = [root_id]
+        while stack:
+            node_id = stack.pop()
+            if node_id in visited or node_id not in nodes:
+                continue
+            visited.add(node_id)
+            node, count = nodes[node_id]
             history.append(
                 {
                     "id": node.id,
@@ -558,59 +1000,93 @@ def get_contract_history(contract_id):
                     "created_at": node.created_at.isoformat()
                     if node.created_at
                     else None,
-                    "clause_count": len(node.clauses),
+                    "clause_count": count,
                 }
             )
-            children = (
-                session.query(Contract)
-                .filter_by(parent_contract_id=node.id)
-                .order_by(Contract.id)
-                .all()
-            )
-            for child in children:
-                traverse(child)
+            stack.extend(reversed(children.get(node_id, [])))
 
-        traverse(root)
-        return jsonify(history), 200
+        return _conditional_json(history)
     finally:
         session.close()
 
 
+def _word_diff_html(words1, words2) -> str:
+    """Word-level diff with <ins>/<del> markup, built from matcher opcodes"""
+    parts = []
+    matcher = SequenceMatcher(None, words1, words2)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            parts.extend(words1[i1:i2])
+            continue
+        parts.extend(f"<del>{word}</del>" for word in words1[i1:i2])
+        parts.extend(f"<ins>{word}</ins>" for word in words2[j1:j2])
+    return " ".join(parts)
+
+
 @app.route("/api/contracts/compare/<int:id1>/<int:id2>", methods=["GET"])
 @login_required
 def compare_contracts(id1, id2):
     """Compare two contracts and find clause changes"""
     session = get_session(engine)
     try:
-        import difflib
-
         c1 = session.query(Contract).filter_by(id=id1).first()
         c2 = session.query(Contract).filter_by(id=id2).first()
         if not c1 or not c2:
             return jsonify({"error": "One or both contracts not found"}), 404
 
-        # Map clauses by section/path for comparison
-        clauses1 = {c.clause_path: c.text for c in c1.clauses if c.clause_path}
-        clauses2 = {c.clause_path: c.text for c in c2.clauses if c.clause_path}
+        from models.database import Clause
 
-        diffs = []
-        all_paths = sorted(set(clauses1.keys()) | set(clauses2.keys()))
+        def clauses_by_path(contract_id):
+            # Latest clause per path, matching a {path: text} mapping
+            latest = (
+                select(func.max(Clause.id))
+                .where(
+                    Clause.contract_id == contract_id,
+                    Clause.clause_path.isnot(None),
+                    Clause.clause_path != "",
+                )
+                .group_by(Clause.clause_path)
+            )
+            return (
+                select(Clause.clause_path, Clause.text, Clause.text_hash)
+                .where(Clause.id.in_(latest))
+                .subquery()
+            )
+
+        # Let the database pair clauses by path and return only the changes
+        a = clauses_by_path(id1)
+        b = clauses_by_path(id2)
+        changed = (
+            select(a.c.clause_path, a.c.text, b.c.text)
+            .outerjoin(b, a.c.clause_path == b.c.clause_path)
+            .where(
+                or_(
+                    b.c.text.is_(None),
+                    # Compare digests, falling back to text for unhashed rows
+                    case(
+                        (
+                            and_(a.c.text_hash.isnot(None), b.c.text_hash.isnot(None)),
+                            a.c.text_hash != b.c.text_hash,
+                        ),
+                        else_=a.c.text != b.c.text,
+                    ),
+                )
+            )
+        )
+        added = (
+            select(b.c.clause_path, literal(None), b.c.text)
+            .outerjoin(a, a.c.clause_path == b.c.clause_path)
+            .where(a.c.clause_path.is_(None))
+        )
+        rows = session.execute(union_all(changed, added)).all()
 
-        for path in all_paths:
-            t1 = clauses1.get(path, "")
-            t2 = clauses2.get(path, "")
+        diffs = []
+        for path, t1, t2 in sorted(rows, key=lambda row: row[0]):
+            t1 = t1 or ""
+            t2 = t2 or ""
 
             if t1 != t2:
-                # Generate a simple diff
-                d = difflib.ndiff(t1.split(), t2.split())
-                diff_html = []
-                for word in d:
-                    if word.startswith("+ "):
-                        diff_html.append(f"<ins>{word[2:]}</ins>")
-                    elif word.startswith("- "):
-                        diff_html.append(f"<del>{word[2:]}</del>")
-                    elif word.startswith("  "):
-                        diff_html.append(word[2:])
+                diff_visual = _word_diff_html(t1.split(), t2.split())
 
                 diffs.append(
                     {
@@ -620,7 +1096,7 @@ def compare_contracts(id1, id2):
                         else ("removed" if not t2 else "modified"),
                         "old_text": t1,
                         "new_text": t2,
-                        "diff_visual": " ".join(diff_html),
+                        "diff_visual": diff_visual,
                     }
                 )
 
@@ -635,48 +1111,64 @@ def compare_contracts(id1, id2):
         session.close()
 
 
+# Clause types whose fix is a standard protective sentence: (addition, rationale)
+_FIX_APPENDS = {
+    ClauseType.LIABILITY: (
+        " Notwithstanding the foregoing, the total liability of either party shall not exceed the total amount paid under this agreement in the twelve (12) months preceding the claim.",
+        "Added a liability cap to mitigate high-risk unlimited exposure.",
+    ),
+    ClauseType.TERMINATION: (
+        " Either party may terminate this agreement for convenience upon thirty (30) days prior written notice.",
+        "Added a termination for convenience right to provide exit flexibility.",
+    ),
+}
+_REASONABLE_RE = re.compile(r"\breasonable\b", re.IGNORECASE)
+_SHALL_RE = re.compile(r"\bshall\b", re.IGNORECASE)
+
+
+def _match_case(replacement: str):
+    """re.sub callback that capitalizes replacement when the match is capitalized"""
+
+    def substitute(match):
+        if match.group(0)[0].isupper():
+            return replacement[0].upper() + replacement[1:]
+        return replacement
+
+    return substitute
+
+
 @app.route("/api/clauses/<int:clause_id>/fix", methods=["POST"])
 @login_required
 def fix_clause(clause_id):
     """Suggest an improved version of a high-risk or ambiguous clause"""
     session = get_session(engine)
     try:
-        from models.database import Clause, ClauseType
+        from models.database import Clause
 
         clause = session.query(Clause).filter_by(id=clause_id).first()
         if not clause:
             return jsonify({"error": "Clause not found"}), 404
 
         original_text = clause.text
-        suggestion = ""
-        rationale = ""
 
         # Simple rule-based fixer for demonstration
         # In a real app, this would call an LLM with a specific prompt
-        if clause.clause_type == ClauseType.LIABILITY:
-            suggestion = (
-                original_text
-                + " Notwithstanding the foregoing, the total liability of either party shall not exceed the total amount paid under this agreement in the twelve (12) months preceding the claim."
-            )
-            rationale = (
-                "Added a liability cap to mitigate high-risk unlimited exposure."
-            )
-        elif clause.clause_type == ClauseType.TERMINATION:
-            suggestion = (
-                original_text
-                + " Either party may terminate this agreement for convenience upon thirty (30) days prior written notice."
-            )
-            rationale = (
-                "Added a termination for convenience right to provide exit flexibility."
-            )
-        elif "reasonable" in original_text.lower():
-            suggestion = original_text.replace("reasonable", "defined and objective")
-            rationale = "Replaced subjective 'reasonable' with objective criteria to reduce ambiguity."
+        if clause.clause_type in _FIX_APPENDS:
+            addition, rationale = _FIX_APPENDS[clause.clause_type]
+            suggestion = original_text + addition
         else:
-            suggestion = "REVISED: " + original_text.replace("shall", "will")
-            rationale = (
-                "Simplified language for better clarity and modern legal standards."
+            suggestion, replaced = _REASONABLE_RE.subn(
+                _match_case("defined and objective"), original_text
             )
+            if replaced:
+                rationale = "Replaced subjective 'reasonable' with objective criteria to reduce ambiguity."
+            else:
+                suggestion = "REVISED: " + _SHALL_RE.sub(
+                    _match_case("will"), original_text
+                )
+                rationale = (
+                    "Simplified language for better clarity and modern legal standards."
+                )
 
         return jsonify(
             {
@@ -696,10 +1188,15 @@ if __name__ == "__main__":
     host = Config.API_HOST
     port = Config.API_PORT
 
+    if Config.WARMUP_MODELS:
+        # Pay the model load before serving instead of on the first upload
+        print("Loading NLP models...")
+        _get_extractor().warmup()
+
     try:
         from waitress import serve
 
-        print("Serving with waitress...")
-        serve(app, host=host, port=port)
+        print(f"Serving with waitress ({Config.SERVER_THREADS} threads)...")
+        serve(app, host=host, port=port, threads=Config.SERVER_THREADS)
     except ImportError:
         app.run(host=host, port=port, debug=Config.DEBUG)
@@ -27,6 +27,9 @@ class Config:
 
     # Security
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-12345")
+    # Seconds a loaded user is reused across requests (0 disables the cache)
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 30))
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 1024))
 
     # API
     API_HOST = os.getenv("API_HOST", "0.0.0.0")
@@ -34,20 +37,80 @@ class Config:
     API_PORT = int(os.getenv("PORT", os.getenv("API_PORT", 5000)))
     # Default to non-debug for a cleaner, more stable "launch" experience.
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+    # Worker threads for the waitress server; uploads are handled concurrently
+    SERVER_THREADS = int(os.getenv("SERVER_THREADS", 8))
+    # Load and run the NLP models once when the server starts
+    WARMUP_MODELS = os.getenv("WARMUP_MODELS", "True").lower() == "true"
 
     # NLP Models
+    # Load spaCy in the extractor (nothing consumes its annotations yet)
+    SPACY_ENABLED = os.getenv("SPACY_ENABLED", "False").lower() == "true"
     SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_lg")
     TRANSFORMER_MODEL = os.getenv(
         "TRANSFORMER_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
     )
+    # Stored embedding precision: "float32", or "int8" for a quarter of the size
+    EMBEDDING_QUANTIZATION = os.getenv("EMBEDDING_QUANTIZATION", "float32").lower()
+    # Clauses encoded per forward pass of the embedding model
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+    # Mirror clause embeddings into an HNSW-indexed pgvector column for QA
+    # retrieval (PostgreSQL with the vector extension and pgvector installed)
+    PGVECTOR_ENABLED = os.getenv("PGVECTOR_ENABLED", "False").lower() == "true"
+    # Embedding dimension of TRANSFORMER_MODEL (384 for all-MiniLM-L6-v2)
+    PGVECTOR_DIMENSIONS = int(os.getenv("PGVECTOR_DIMENSIONS", 384))
+    # Reuse embeddings of clause texts seen in earlier extractions
+    EMBEDDING_CACHE_ENABLED = (
+        os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+    )
+    # Embedding inference backend: "torch", "onnx" or "openvino"
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+    # Model file inside the repository for the ONNX/OpenVINO backends
+    # (e.g. an int8 quantized "onnx/model_qint8_avx2.onnx"); empty for default
+    EMBEDDING_MODEL_FILE = os.getenv("EMBEDDING_MODEL_FILE", "")
+    # Run the torch model in half precision when it is on a GPU
+    EMBEDDING_FP16 = os.getenv("EMBEDDING_FP16", "False").lower() == "true"
+    # CPU threads for torch inference (0 keeps torch's default)
+    TORCH_THREADS = int(os.getenv("TORCH_THREADS", 0))
+    # Number of recent question embeddings kept in memory by the QA system
+    QA_EMBEDDING_CACHE_SIZE = int(os.getenv("QA_EMBEDDING_CACHE_SIZE", 1024))
+    # Number of decoded clause embedding matrices (one per contract) kept by QA
+    QA_MATRIX_CACHE_SIZE = int(os.getenv("QA_MATRIX_CACHE_SIZE", 32))
+    # In-process QA vector index (needs faiss): "auto" (8-bit quantized for
+    # int8 storage, else exact), "exact", "int8" or "hnsw" for large corpora
+    QA_VECTOR_INDEX = os.getenv("QA_VECTOR_INDEX", "auto").lower()
+    # HNSW graph degree and search breadth (higher is more accurate, slower)
+    QA_HNSW_M = int(os.getenv("QA_HNSW_M", 32))
+    QA_HNSW_EF_SEARCH = int(os.getenv("QA_HNSW_EF_SEARCH", 64))
+    # Directory where built QA indexes are saved for reuse; empty disables
+    QA_INDEX_FOLDER = os.getenv("QA_INDEX_FOLDER", "")
+    # Rank QA evidence by fusing semantic and full-text results (PostgreSQL)
+    QA_HYBRID_SEARCH = os.getenv("QA_HYBRID_SEARCH", "True").lower() == "true"
+    # Save answered questions from a background thread in batched INSERTs
+    QA_BATCH_WRITES = os.getenv("QA_BATCH_WRITES", "True").lower() == "true"
+    # Seconds the QA writer waits to collect more rows into one INSERT
+    QA_WRITE_INTERVAL = float(os.getenv("QA_WRITE_INTERVAL", 0.25))
 
     # Risk Assessment Thresholds
     HIGH_RISK_THRESHOLD = float(os.getenv("HIGH_RISK_THRESHOLD", 0.8))
     MEDIUM_RISK_THRESHOLD = float(os.getenv("MEDIUM_RISK_THRESHOLD", 0.5))
 
+    # Upload processing: analyze uploads on a background thread pool and
+    # answer 202 immediately instead of blocking the request
+    ASYNC_PROCESSING = os.getenv("ASYNC_PROCESSING", "False").lower() == "true"
+    PROCESSING_WORKERS = int(os.getenv("PROCESSING_WORKERS", 2))
+    # "thread" or "process"; worker processes sidestep the GIL but each loads
+    # its own copy of the NLP models
+    PROCESSING_POOL = os.getenv("PROCESSING_POOL", "thread").lower()
+    # Threads building audit reports in the background (with ASYNC_PROCESSING)
+    REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", 2))
+
     # Conflict Detection
     SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", 0.85))
     CONFLICT_THRESHOLD = float(os.getenv("CONFLICT_THRESHOLD", 0.3))
+    # Nearest neighbors probed per clause when faiss is installed
+    CONFLICT_NEIGHBORS = int(os.getenv("CONFLICT_NEIGHBORS", 16))
+    # Clause count from which the faiss search runs on int8 quantized vectors
+    CONFLICT_INT8_MIN_CLAUSES = int(os.getenv("CONFLICT_INT8_MIN_CLAUSES", 1024))
 
     # Directories
     # On Vercel, we must use /tmp for any writable operations
@@ -58,6 +121,18 @@ class Config:
     REPORTS_FOLDER = os.path.join(BASE_DIR, "generated_reports")
     TEMP_FOLDER = os.path.join(BASE_DIR, "temp_files")
 
+    # PDFs with at least this many pages are parsed by PDF_WORKERS processes;
+    # Vercel's runtime has no /dev/shm for a process pool, so one by default
+    PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 16))
+    PDF_WORKERS = int(os.getenv("PDF_WORKERS", 1 if IS_VERCEL else os.cpu_count() or 1))
+
+    # Chunk size for copying (and hashing) uploads to disk
+    UPLOAD_BUFFER_SIZE = int(os.getenv("UPLOAD_BUFFER_SIZE", 1024 * 1024))
+
+    # Response compression (used when Flask-Compress is installed)
+    COMPRESS_ALGORITHM = os.getenv("COMPRESS_ALGORITHM", "br,gzip").split(",")
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+
     # Clause Types (Common contract clause categories)
     CLAUSE_TYPES = [
         "OBLIGATION",
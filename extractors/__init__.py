@@ -2,7 +2,23 @@
 Extractors package initialization
 """
 
-from .document_parser import DocumentParser, StructureAnalyzer, ClauseIdentifier
-from .clause_extractor import ClauseExtractor
+import importlib
+
+# Exported names -> defining submodule, imported on first access (PEP 562)
+_LAZY_ATTRS = {
+    "DocumentParser": ".document_parser",
+    "StructureAnalyzer": ".document_parser",
+    "ClauseIdentifier": ".document_parser",
+    "ClauseExtractor": ".clause_extractor",
+}
 
 __all__ = ["DocumentParser", "StructureAnalyzer", "ClauseIdentifier", "ClauseExtractor"]
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
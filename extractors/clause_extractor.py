@@ -2,18 +2,72 @@
 Main clause extractor that orchestrates the extraction process
 """
 
-import json
+import re
 from typing import List, Dict
 from datetime import datetime
 
+from sqlalchemy import select
+
 from .document_parser import DocumentParser, StructureAnalyzer, ClauseIdentifier
-from models.database import Contract, Clause, ClauseType
+from models.database import (
+    Contract,
+    Clause,
+    ClauseType,
+    EmbeddingCache,
+    clause_text_hash,
+)
+from models.vector_store import add_clause_vectors, vector_store_enabled
 from config import Config
+from utils.keyword_matcher import KeywordMatcher
+from utils.nlp_models import get_embedding_model, get_spacy_model
+from utils.embeddings import decode_embedding, encode_embedding, quantize_embedding
+
+
+def _embedding_model_name() -> str:
+    """Embedding cache key for the configured model (and weights file)"""
+    if Config.EMBEDDING_MODEL_FILE:
+        # A quantized export encodes slightly differently from the original
+        return f"{Config.TRANSFORMER_MODEL}:{Config.EMBEDDING_MODEL_FILE}"
+    return Config.TRANSFORMER_MODEL
+
+
+# Characters _normalize_text replaces: neither alphanumeric nor whitespace
+_SPECIAL_CHARS_RE = re.compile(r"[^\w\s]|_")
 
 
 class ClauseExtractor:
     """Main extraction engine for contract clauses"""
 
+    # spaCy components skipped at load time. Clause typing is keyword based,
+    # so no trained component is used; only the tokenizer is kept.
+    SPACY_DISABLED = [
+        "tok2vec",
+        "tagger",
+        "parser",
+        "senter",
+        "attribute_ruler",
+        "lemmatizer",
+        "ner",
+    ]
+
+    # Keywords that refine a clause's type; the first matching type wins
+    _REFINE_MATCHER = KeywordMatcher(
+        {
+            ClauseType.CONFIDENTIALITY: ["confidential", "non-disclosure"],
+            ClauseType.PAYMENT: ["payment", "fee", "invoice"],
+            ClauseType.INTELLECTUAL_PROPERTY: [
+                "intellectual property",
+                "copyright",
+                "patent",
+            ],
+            ClauseType.WARRANTY: ["warranty", "warrants", "guarantee"],
+            ClauseType.INDEMNIFICATION: ["indemnif", "hold harmless"],
+            ClauseType.FORCE_MAJEURE: ["force majeure", "act of god"],
+            ClauseType.DISPUTE_RESOLUTION: ["dispute", "arbitration", "litigation"],
+            ClauseType.AMENDMENT: ["amend", "modification", "change"],
+        }
+    )
+
     def __init__(self):
         """Initialize NLP models"""
         self.nlp = None
@@ -21,39 +75,27 @@ class ClauseExtractor:
         self._load_models()
 
     def _load_models(self):
-        """Load NLP and embedding models"""
-        # spaCy is optional (used for richer clause type refinement).
-        try:
-            import spacy  # type: ignore
-
-            try:
-                self.nlp = spacy.load(Config.SPACY_MODEL)
-            except OSError:
-                print(
-                    f"Warning: spaCy model '{Config.SPACY_MODEL}' not found. Using en_core_web_sm"
-                )
-                try:
-                    self.nlp = spacy.load("en_core_web_sm")
-                except OSError:
-                    self.nlp = None
-                    print("Warning: No spaCy model available.")
-        except Exception as e:
-            self.nlp = None
-            print(
-                f"Warning: spaCy not available ({type(e).__name__}). Clause extraction will run in lightweight mode."
-            )
+        """Load NLP and embedding models (shared across extractors)"""
+        # spaCy is optional and off by default: none of its output is used
+        # yet, so loading it would only cost memory and startup time.
+        if Config.SPACY_ENABLED:
+            self.nlp = get_spacy_model(disable=self.SPACY_DISABLED)
 
         # sentence-transformers is optional (used for semantic embeddings).
-        # Catch ANY exception (import errors, version mismatches, download issues, etc.)
-        try:
-            from sentence_transformers import SentenceTransformer  # type: ignore
+        self.embedding_model = get_embedding_model()
 
-            self.embedding_model = SentenceTransformer(Config.TRANSFORMER_MODEL)
-        except Exception as e:
-            self.embedding_model = None
-            print(
-                f"Warning: Could not load embedding model ({type(e).__name__}: {e}). Embeddings will be disabled."
-            )
+    def warmup(self):
+        """
+        Run each loaded model once so lazy initialization (torch kernels,
+        tokenizer vocabularies) happens now rather than on the first upload
+        """
+        if self.embedding_model is not None:
+            try:
+                self.embedding_model.encode(["warm"], show_progress_bar=False)
+            except Exception as e:
+                print(f"Warning: embedding warmup failed ({type(e).__name__}: {e}).")
+        if self.nlp is not None:
+            self.nlp("warm")
 
     def extract_from_contract(
         self, contract: Contract, file_path: str, session
@@ -67,7 +109,8 @@ class ClauseExtractor:
             session: Database session
 
         Returns:
-            List of extracted Clause objects
+            List of extracted Clause objects (saved, but not attached to
+            the session)
         """
         # Step 1: Parse document
         print(f"Parsing document: {file_path}")
@@ -76,21 +119,24 @@ class ClauseExtractor:
         # Step 2: Analyze structure for each page
         all_clauses = []
         clause_position = 0
+        # Every clause of one extraction shares its timestamp
+        extracted_at = datetime.utcnow()
 
         for page_num, page_text in pages.items():
             print(f"Processing page {page_num}...")
 
             # Identify sections
             sections = StructureAnalyzer.identify_sections(page_text)
+            lines = page_text.split("\n")
 
             if not sections:
                 # No clear structure, treat entire page as sections
                 sections = [("", "Document Text", 0)]
 
             # Extract clauses from each section
-            for section_num, section_title, position in sections:
+            for section_idx, (section_num, section_title, _) in enumerate(sections):
                 # Get text for this section
-                section_text = self._extract_section_text(page_text, position, sections)
+                section_text = self._extract_section_text(lines, section_idx, sections)
 
                 # Split into individual clauses
                 clause_dicts = ClauseIdentifier.split_into_clauses(
@@ -106,46 +152,38 @@ class ClauseExtractor:
                         section_title=section_title,
                         page_number=page_num,
                         position=clause_position,
+                        extracted_at=extracted_at,
                     )
                     all_clauses.append(clause)
                     clause_position += 1
 
         # Step 3: Enhance clauses with NLP analysis
         print("Enhancing clauses with NLP analysis...")
-        self._enhance_clauses(all_clauses)
+        self._enhance_clauses(all_clauses, session)
 
         # Step 4: Save to database
         print(f"Saving {len(all_clauses)} clauses to database...")
-        for clause in all_clauses:
-            session.add(clause)
+        # Bulk insert skips unit-of-work bookkeeping; return_defaults keeps
+        # the generated ids on the returned objects
+        session.bulk_save_objects(all_clauses, return_defaults=True)
+        if vector_store_enabled(session.get_bind()):
+            add_clause_vectors(session, all_clauses)
 
         session.commit()
 
         return all_clauses
 
     def _extract_section_text(
-        self, full_text: str, start_pos: int, all_sections: List
+        self, lines: List[str], section_idx: int, all_sections: List
     ) -> str:
-        """Extract text belonging to a specific section"""
-        lines = full_text.split("\n")
-
-        # Find the next section position
-        current_idx = None
-        next_idx = None
-
-        for i, (_, _, pos) in enumerate(all_sections):
-            if pos == start_pos:
-                current_idx = i
-            elif current_idx is not None and pos > start_pos:
-                next_idx = i
-                break
-
-        if current_idx is not None:
-            start_line = all_sections[current_idx][2]
-            end_line = all_sections[next_idx][2] if next_idx is not None else len(lines)
-            return "\n".join(lines[start_line:end_line])
-
-        return ""
+        """Extract text belonging to the section at section_idx from the page's lines"""
+        # Sections are in line order; each runs until the next one starts
+        start_line = all_sections[section_idx][2]
+        if section_idx + 1 < len(all_sections):
+            end_line = all_sections[section_idx + 1][2]
+        else:
+            end_line = len(lines)
+        return "\n".join(lines[start_line:end_line])
 
     def _create_clause(
         self,
@@ -155,6 +193,7 @@ class ClauseExtractor:
         section_title: str,
         page_number: int,
         position: int,
+        extracted_at: datetime,
     ) -> Clause:
         """Create a Clause object from extracted data"""
         text = clause_dict["text"]
@@ -166,11 +205,16 @@ class ClauseExtractor:
             else str(clause_dict["clause_number"])
         )
 
+        # Lowercase once for both normalization and type refinement
+        text_lower = text.lower()
+
         # Normalize text for comparison
-        normalized_text = self._normalize_text(text)
+        normalized_text = self._normalize_lowered(text_lower)
 
-        # Map estimated type to enum
-        clause_type = self._map_clause_type(clause_dict["estimated_type"])
+        # Map estimated type to enum, then refine it from keywords
+        clause_type = self._refine_clause_type(
+            text_lower, self._map_clause_type(clause_dict["estimated_type"])
+        )
 
         clause = Clause(
             contract_id=contract.id,
@@ -182,47 +226,128 @@ class ClauseExtractor:
             clause_type=clause_type,
             page_number=page_number,
             position_in_document=position,
-            extracted_at=datetime.utcnow(),
+            extracted_at=extracted_at,
         )
 
         return clause
 
-    def _enhance_clauses(self, clauses: List[Clause]):
-        """Enhance clauses with NLP features"""
+    def _enhance_clauses(self, clauses: List[Clause], session=None):
+        """
+        Enhance clauses with NLP features
+
+        With a session, embeddings of texts seen before (in this or any
+        earlier contract) are read from the embedding cache instead of
+        being re-encoded, and new ones are added to it.
+        """
+        embeddings = [None] * len(clauses)
         # Generate embeddings in batch for efficiency (if enabled)
-        if self.embedding_model is not None:
-            texts = [clause.text for clause in clauses]
-            try:
-                embeddings = self.embedding_model.encode(texts, show_progress_bar=True)
-            except Exception as e:
-                print(
-                    f"Warning: embedding encode failed ({type(e).__name__}: {e}). Continuing without embeddings."
-                )
-                embeddings = [None] * len(clauses)
-        else:
-            embeddings = [None] * len(clauses)
+        if self.embedding_model is not None and clauses:
+            use_cache = session is not None and Config.EMBEDDING_CACHE_ENABLED
+            hashes = [clause_text_hash(clause.text) for clause in clauses]
+            vectors = self._cached_embeddings(session, hashes) if use_cache else {}
+
+            # Encode each distinct uncached text once
+            missing = {}
+            for clause, text_hash in zip(clauses, hashes):
+                if text_hash not in vectors:
+                    missing.setdefault(text_hash, clause.text)
+
+            encoded = self._encode_texts(list(missing.values())) if missing else []
+            if encoded is not None:
+                vectors.update(zip(missing, encoded))
+                if use_cache and missing:
+                    self._cache_embeddings(session, zip(missing, encoded))
+
+            embeddings = [vectors.get(text_hash) for text_hash in hashes]
 
         for clause, embedding in zip(clauses, embeddings):
-            # Store embedding as JSON (optional)
+            # Store embedding as raw float32 or int8 bytes (optional)
+            clause.embedding_bytes = None
+            clause.embedding_scale = None
             if embedding is not None:
-                # sentence-transformers returns numpy arrays; convert defensively.
-                clause.embedding_vector = json.dumps(list(map(float, embedding)))
-            else:
-                clause.embedding_vector = None
+                if Config.EMBEDDING_QUANTIZATION == "int8":
+                    clause.embedding_bytes, clause.embedding_scale = quantize_embedding(
+                        embedding
+                    )
+                else:
+                    clause.embedding_bytes = encode_embedding(embedding)
+            clause.embedding_vector = None
 
-            # Additional NLP analysis with spaCy (optional)
-            refined_type = self._refine_clause_type(clause.text, clause.clause_type)
-            clause.clause_type = refined_type
+    def _encode_texts(self, texts: List[str]):
+        """Encode texts in batches; None if the model fails"""
+        try:
+            # encode() already orders each batch by text length to limit
+            # padding, so only the batch size is tuned here.
+            # Unit-length float32 numpy rows: stored as-is, and cosine
+            # similarity between them is a plain dot product
+            return self.embedding_model.encode(
+                texts,
+                batch_size=Config.EMBEDDING_BATCH_SIZE,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            )
+        except Exception as e:
+            print(
+                f"Warning: embedding encode failed ({type(e).__name__}: {e}). Continuing without embeddings."
+            )
+            return None
+
+    @staticmethod
+    def _cached_embeddings(session, hashes: List[bytes]) -> Dict[bytes, object]:
+        """Look up cached embeddings for text digests under the current model"""
+        vectors = {}
+        distinct = list(set(hashes))
+        # Chunked to stay under the database's bound-parameter limit
+        for i in range(0, len(distinct), 500):
+            rows = session.execute(
+                select(EmbeddingCache.text_hash, EmbeddingCache.embedding_bytes).where(
+                    EmbeddingCache.model_name == _embedding_model_name(),
+                    EmbeddingCache.text_hash.in_(distinct[i : i + 500]),
+                )
+            )
+            for text_hash, blob in rows:
+                vector = decode_embedding(blob)
+                if vector is not None:
+                    vectors[text_hash] = vector
+        return vectors
+
+    @staticmethod
+    def _cache_embeddings(session, items):
+        """Add (text digest, embedding) pairs to the cache in the session's transaction"""
+        rows = [
+            {
+                "text_hash": text_hash,
+                "model_name": _embedding_model_name(),
+                "embedding_bytes": encode_embedding(vector),
+                "created_at": datetime.utcnow(),
+            }
+            for text_hash, vector in items
+        ]
+        dialect = session.get_bind().dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            # No portable upsert; concurrent extractions may race on a key
+            session.execute(EmbeddingCache.__table__.insert(), rows)
+            return
+        # Another extraction may have cached the same text meanwhile
+        session.execute(insert(EmbeddingCache).on_conflict_do_nothing(), rows)
 
     def _normalize_text(self, text: str) -> str:
         """Normalize text for comparison"""
-        # Remove extra whitespace
-        text = " ".join(text.split())
-        # Lowercase
-        text = text.lower()
-        # Remove special characters
-        text = "".join(c if c.isalnum() or c.isspace() else " " for c in text)
-        return text
+        return self._normalize_lowered(text.lower())
+
+    @staticmethod
+    def _normalize_lowered(text_lower: str) -> str:
+        """Normalize already-lowercased text"""
+        # Replace special characters (anything not alphanumeric or
+        # whitespace) with spaces in one C-level pass
+        text = _SPECIAL_CHARS_RE.sub(" ", text_lower)
+        # Remove extra whitespace, including any left by removed characters
+        return " ".join(text.split())
 
     def _map_clause_type(self, estimated_type: str) -> ClauseType:
         """Map string type to ClauseType enum"""
@@ -235,50 +360,15 @@ class ClauseExtractor:
         }
         return type_map.get(estimated_type, ClauseType.GENERAL)
 
-    def _refine_clause_type(self, text: str, current_type: ClauseType) -> ClauseType:
-        """Refine clause type using lightweight keyword heuristics."""
-        text_lower = (text or "").lower()
-
-        # Check for specific clause types based on keywords and patterns
-        if "confidential" in text_lower or "non-disclosure" in text_lower:
-            return ClauseType.CONFIDENTIALITY
-
-        if "payment" in text_lower or "fee" in text_lower or "invoice" in text_lower:
-            return ClauseType.PAYMENT
-
-        if (
-            "intellectual property" in text_lower
-            or "copyright" in text_lower
-            or "patent" in text_lower
-        ):
-            return ClauseType.INTELLECTUAL_PROPERTY
-
-        if (
-            "warranty" in text_lower
-            or "warrants" in text_lower
-            or "guarantee" in text_lower
-        ):
-            return ClauseType.WARRANTY
-
-        if "indemnif" in text_lower or "hold harmless" in text_lower:
-            return ClauseType.INDEMNIFICATION
-
-        if "force majeure" in text_lower or "act of god" in text_lower:
-            return ClauseType.FORCE_MAJEURE
-
-        if (
-            "dispute" in text_lower
-            or "arbitration" in text_lower
-            or "litigation" in text_lower
-        ):
-            return ClauseType.DISPUTE_RESOLUTION
-
-        if (
-            "amend" in text_lower
-            or "modification" in text_lower
-            or "change" in text_lower
-        ):
-            return ClauseType.AMENDMENT
+    def _refine_clause_type(
+        self, text_lower: str, current_type: ClauseType
+    ) -> ClauseType:
+        """Refine clause type from lowercased text using keyword heuristics."""
+        # Check for specific clause types based on keywords, in priority order
+        hits = self._REFINE_MATCHER.categories(text_lower or "")
+        for clause_type in self._REFINE_MATCHER.keywords:
+            if clause_type in hits:
+                return clause_type
 
         # Keep current type if no better match
         return current_type
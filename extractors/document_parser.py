@@ -7,13 +7,35 @@ This module is intentionally resilient to optional dependencies:
 If those packages are not installed, the API can still start and TXT parsing will work.
 """
 
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, List, Tuple
 
+from config import Config
+from utils.keyword_matcher import KeywordMatcher
+
+
+def _extract_pdf_pages(file_path: str, start: int, stop: int) -> Dict[int, str]:
+    """Extract the text of pages [start, stop) of a PDF (run in a worker process)"""
+    import pdfplumber  # type: ignore
+
+    pages = {}
+    with pdfplumber.open(file_path) as pdf:
+        for i in range(start, min(stop, len(pdf.pages))):
+            text = pdf.pages[i].extract_text()
+            if text:
+                pages[i + 1] = text
+    return pages
+
 
 class DocumentParser:
     """Parse documents and extract structured text"""
 
+    # File extension -> name of the parser method
+    _PARSERS = {".pdf": "parse_pdf", ".docx": "parse_docx", ".txt": "parse_txt"}
+
     @staticmethod
     def parse_pdf(file_path: str) -> Dict[int, str]:
         """
@@ -32,10 +54,35 @@ class DocumentParser:
             ) from e
 
         with pdfplumber.open(file_path) as pdf:
-            for i, page in enumerate(pdf.pages):
-                text = page.extract_text()
-                if text:
-                    pages[i + 1] = text
+            page_count = len(pdf.pages)
+            workers = min(Config.PDF_WORKERS, page_count)
+            if page_count < Config.PDF_PARALLEL_MIN_PAGES or workers < 2:
+                for i, page in enumerate(pdf.pages):
+                    text = page.extract_text()
+                    if text:
+                        pages[i + 1] = text
+                return pages
+
+        # Layout analysis is pure Python, so large PDFs are split into one
+        # contiguous page range per worker process; each reopens the file
+        # since pdfplumber objects cannot be pickled.
+        step = -(-page_count // workers)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_extract_pdf_pages, file_path, start, start + step)
+                    for start in range(0, page_count, step)
+                ]
+                for future in futures:
+                    pages.update(future.result())
+        except (OSError, BrokenProcessPool) as e:
+            # No usable process pool here (e.g. no /dev/shm on serverless
+            # runtimes); parse the pages in this process instead
+            print(
+                f"Warning: parallel PDF parsing unavailable ({type(e).__name__}: {e}). "
+                "Parsing sequentially."
+            )
+            pages = _extract_pdf_pages(file_path, 0, page_count)
 
         return pages
 
@@ -79,14 +126,10 @@ class DocumentParser:
         Returns:
             Dict mapping page/section numbers to text
         """
-        if file_path.lower().endswith(".pdf"):
-            return cls.parse_pdf(file_path)
-        elif file_path.lower().endswith(".docx"):
-            return cls.parse_docx(file_path)
-        elif file_path.lower().endswith(".txt"):
-            return cls.parse_txt(file_path)
-        else:
+        parser = cls._PARSERS.get(os.path.splitext(file_path)[1].lower())
+        if parser is None:
             raise ValueError(f"Unsupported file format: {file_path}")
+        return getattr(cls, parser)(file_path)
 
 
 class StructureAnalyzer:
@@ -102,6 +145,10 @@ class StructureAnalyzer:
         r"^\([ivxIVX]+\)",  # (i), (ii), (iii)
     ]
 
+    # All header patterns as one alternation, so each line is matched once
+    _SECTION_RE = re.compile("|".join(f"(?:{p})" for p in SECTION_PATTERNS))
+    _SECTION_SPLIT_RE = re.compile(r"^([\d\.\(\)a-z ivxIVX]+)\s*(.*)")
+
     @classmethod
     def identify_sections(cls, text: str) -> List[Tuple[str, str, int]]:
         """
@@ -119,15 +166,13 @@ class StructureAnalyzer:
                 continue
 
             # Check if line matches any section pattern
-            for pattern in cls.SECTION_PATTERNS:
-                if re.match(pattern, line):
-                    # Extract section number and title
-                    match = re.match(r"^([\d\.\(\)a-z ivxIVX]+)\s*(.*)", line)
-                    if match:
-                        section_num = match.group(1).strip()
-                        title = match.group(2).strip()
-                        sections.append((section_num, title, i))
-                    break
+            if cls._SECTION_RE.match(line):
+                # Extract section number and title
+                match = cls._SECTION_SPLIT_RE.match(line)
+                if match:
+                    section_num = match.group(1).strip()
+                    title = match.group(2).strip()
+                    sections.append((section_num, title, i))
 
         return sections
 
@@ -194,6 +239,20 @@ class ClauseIdentifier:
         "end this agreement",
     ]
 
+    # Checked in this order; exclusions first since they are more specific
+    _TYPE_MATCHER = KeywordMatcher(
+        {
+            "EXCLUSION": EXCLUSION_KEYWORDS,
+            "OBLIGATION": OBLIGATION_KEYWORDS,
+            "LIABILITY": LIABILITY_KEYWORDS,
+            "TERMINATION": TERMINATION_KEYWORDS,
+        }
+    )
+
+    # Sentence-like boundaries, and sentences that open a numbered/lettered clause
+    _SENTENCE_SPLIT_RE = re.compile(r"(?<=[.;])\s+(?=[A-Z(])")
+    _CLAUSE_START_RE = re.compile(r"^[\(\[]*[a-z0-9ivx]+[\)\]]\s*")
+
     @classmethod
     def split_into_clauses(cls, text: str, section_info: Dict) -> List[Dict]:
         """
@@ -202,47 +261,28 @@ class ClauseIdentifier:
         Returns:
             List of clause dictionaries with metadata
         """
-        clauses = []
-
-        # Split by sentence-like boundaries
-        sentences = re.split(r"(?<=[.;])\s+(?=[A-Z(])", text)
-
-        current_clause = []
-        clause_number = 1
-
-        for sentence in sentences:
+        # Group sentences into clauses: a new clause starts at every
+        # sentence that opens with a number or letter marker
+        groups = []
+        for sentence in cls._SENTENCE_SPLIT_RE.split(text):
             sentence = sentence.strip()
             if not sentence:
                 continue
 
-            # Check if this starts a new clause (numbered or lettered)
-            if re.match(r"^[\(\[]*[a-z0-9ivx]+[\)\]]\s*", sentence):
-                # Save previous clause if exists
-                if current_clause:
-                    clause_text = " ".join(current_clause)
-                    clauses.append(
-                        {
-                            "text": clause_text,
-                            "clause_number": clause_number,
-                            "section_number": section_info.get("number", ""),
-                            "estimated_type": cls._estimate_clause_type(clause_text),
-                        }
-                    )
-                    clause_number += 1
-
-                # Start new clause
-                current_clause = [sentence]
+            if not groups or cls._CLAUSE_START_RE.match(sentence):
+                groups.append([sentence])
             else:
-                current_clause.append(sentence)
+                groups[-1].append(sentence)
 
-        # Don't forget the last clause
-        if current_clause:
-            clause_text = " ".join(current_clause)
+        section_number = section_info.get("number", "")
+        clauses = []
+        for clause_number, sentences in enumerate(groups, start=1):
+            clause_text = " ".join(sentences)
             clauses.append(
                 {
                     "text": clause_text,
                     "clause_number": clause_number,
-                    "section_number": section_info.get("number", ""),
+                    "section_number": section_number,
                     "estimated_type": cls._estimate_clause_type(clause_text),
                 }
             )
@@ -252,22 +292,10 @@ class ClauseIdentifier:
     @classmethod
     def _estimate_clause_type(cls, text: str) -> str:
         """Estimate clause type based on keywords"""
-        text_lower = text.lower()
-
-        # Check for exclusions first (more specific)
-        if any(keyword in text_lower for keyword in cls.EXCLUSION_KEYWORDS):
-            return "EXCLUSION"
-
-        # Then obligations
-        if any(keyword in text_lower for keyword in cls.OBLIGATION_KEYWORDS):
-            return "OBLIGATION"
-
-        # Liability
-        if any(keyword in text_lower for keyword in cls.LIABILITY_KEYWORDS):
-            return "LIABILITY"
-
-        # Termination
-        if any(keyword in text_lower for keyword in cls.TERMINATION_KEYWORDS):
-            return "TERMINATION"
+        # One scan finds every keyword; the first type in priority order wins
+        hits = cls._TYPE_MATCHER.categories(text.lower())
+        for clause_type in cls._TYPE_MATCHER.keywords:
+            if clause_type in hits:
+                return clause_type
 
         return "GENERAL"
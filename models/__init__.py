@@ -11,6 +11,8 @@ from .database import (
     ClauseReview,
     DecisionLog,
     QuestionAnswer,
+    Report,
+    EmbeddingCache,
     ClauseType,
     RiskLevel,
     ReviewStatus,
@@ -47,6 +49,8 @@ __all__ = [
     "ClauseReview",
     "DecisionLog",
     "QuestionAnswer",
+    "Report",
+    "EmbeddingCache",
     "ClauseType",
     "RiskLevel",
     "ReviewStatus",
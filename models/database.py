@@ -2,10 +2,21 @@
 Database models for the Contract Clause Detection System
 """
 
+import hashlib
 import os
+import weakref
+from typing import Optional
 
 from sqlalchemy import (
     create_engine,
+    event,
+    func,
+    inspect,
+    literal_column,
+    select,
+    text,
+    update,
+    Index,
     Column,
     Integer,
     String,
@@ -14,10 +25,13 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Boolean,
+    LargeBinary,
     Enum as SQLEnum,
 )
+from sqlalchemy.dialects import postgresql  # noqa: F401 (registers to_tsvector)
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.orm import relationship, sessionmaker, validates
 from datetime import datetime
 import enum
 
@@ -51,6 +65,11 @@ class RiskLevel(enum.Enum):
     CRITICAL = "CRITICAL"
 
 
+# Text search configuration of the PostgreSQL full-text index on clause text;
+# queries must use the same expression for the index to apply
+TEXT_SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+
 class ReviewStatus(enum.Enum):
     """Review workflow status"""
 
@@ -61,6 +80,16 @@ class ReviewStatus(enum.Enum):
     NEEDS_CLARIFICATION = "NEEDS_CLARIFICATION"
 
 
+def _string_enum(enum_class) -> SQLEnum:
+    """
+    Enum column type stored as VARCHAR with a CHECK constraint
+
+    Avoids PostgreSQL ENUM types, which need ALTER TYPE to gain a member.
+    Existing native enum columns keep working: values are the same names.
+    """
+    return SQLEnum(enum_class, native_enum=False, length=32, create_constraint=True)
+
+
 class User(Base):
     """User for application authentication"""
 
@@ -98,6 +127,8 @@ class Contract(Base):
 
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
+    # First word of the name, used to find other versions of a contract
+    name_root = Column(String(255), index=True)
     original_filename = Column(String(255))
     file_path = Column(String(500))
     version = Column(String(50))
@@ -105,20 +136,46 @@ class Contract(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # PROCESSING while clauses are extracted and analyzed, then COMPLETED/FAILED
+    processing_status = Column(String(20), default="COMPLETED")
+
     # Is this an amendment or addendum?
     is_amendment = Column(Boolean, default=False)
     parent_contract_id = Column(Integer, ForeignKey("contracts.id"), nullable=True)
 
     # Relationships
     parent_contract = relationship("Contract", remote_side=[id], backref="amendments")
+    # Ordered explicitly: otherwise the order depends on which index the
+    # database picks to load a contract's clauses
     clauses = relationship(
-        "Clause", back_populates="contract", cascade="all, delete-orphan"
+        "Clause",
+        back_populates="contract",
+        cascade="all, delete-orphan",
+        order_by="Clause.id",
     )
 
+    @validates("name")
+    def _set_name_root(self, key, name):
+        self.name_root = contract_name_root(name)
+        return name
+
     def __repr__(self):
         return f"<Contract(id={self.id}, name='{self.name}', version='{self.version}')>"
 
 
+def contract_name_root(name: Optional[str]) -> Optional[str]:
+    """First whitespace-delimited word of a contract name"""
+    parts = (name or "").split(maxsplit=1)
+    return parts[0] if parts else None
+
+
+def clause_text_hash(text: Optional[str]) -> Optional[bytes]:
+    """16-byte BLAKE2b digest of a clause's text"""
+    if text is None:
+        return None
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
 class Clause(Base):
     """Individual clause within a contract"""
 
@@ -134,11 +191,14 @@ class Clause(Base):
 
     # Content
     text = Column(Text, nullable=False)
+    text_hash = Column(LargeBinary(16))  # Digest of text for cheap equality checks
     normalized_text = Column(Text)  # Cleaned version for comparison
 
     # Classification
-    clause_type = Column(SQLEnum(ClauseType), default=ClauseType.GENERAL)
-    risk_level = Column(SQLEnum(RiskLevel), default=RiskLevel.LOW)
+    clause_type = Column(
+        _string_enum(ClauseType), default=ClauseType.GENERAL, index=True
+    )
+    risk_level = Column(_string_enum(RiskLevel), default=RiskLevel.LOW)
 
     # Metadata
     page_number = Column(Integer)
@@ -146,7 +206,12 @@ class Clause(Base):
     extracted_at = Column(DateTime, default=datetime.utcnow)
 
     # Embedding for semantic search
-    embedding_vector = Column(Text)  # Stored as JSON string
+    embedding_vector = Column(Text)  # Legacy JSON string
+    embedding_bytes = Column(LargeBinary)  # Raw float32, preferred when present
+    embedding_scale = Column(Float)  # Set when embedding_bytes holds int8
+    # Last time any embedding column was set; cached QA matrices and indexes
+    # are rebuilt when it moves, so rewrites in place are picked up too
+    embedding_updated_at = Column(DateTime)
 
     # Relationships
     contract = relationship("Contract", back_populates="clauses")
@@ -160,6 +225,29 @@ class Clause(Base):
         "Interpretation", back_populates="clause", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # Clauses of a contract, optionally of one type
+        Index("ix_clauses_contract_type", "contract_id", "clause_type"),
+        # High-risk clauses of a contract (batch review assignment)
+        Index("ix_clauses_contract_risk", "contract_id", "risk_level"),
+        # Full-text index for QA retrieval (PostgreSQL only)
+        Index(
+            "ix_clauses_text_search",
+            func.to_tsvector(TEXT_SEARCH_CONFIG, text),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    @validates("text")
+    def _set_text_hash(self, key, text):
+        self.text_hash = clause_text_hash(text)
+        return text
+
+    @validates("embedding_vector", "embedding_bytes", "embedding_scale")
+    def _set_embedding_updated_at(self, key, value):
+        self.embedding_updated_at = datetime.utcnow()
+        return value
+
     def __repr__(self):
         return f"<Clause(id={self.id}, section='{self.section_number}', type={self.clause_type.value})>"
 
@@ -171,14 +259,16 @@ class Conflict(Base):
 
     id = Column(Integer, primary_key=True)
     clause_id = Column(Integer, ForeignKey("clauses.id"), nullable=False)
-    conflicting_clause_id = Column(Integer, ForeignKey("clauses.id"), nullable=False)
+    conflicting_clause_id = Column(
+        Integer, ForeignKey("clauses.id"), nullable=False, index=True
+    )
 
     # Conflict details
     conflict_type = Column(
         String(100)
     )  # e.g., "OVERRIDE", "CONTRADICTION", "AMBIGUITY"
     description = Column(Text)
-    severity = Column(SQLEnum(RiskLevel), default=RiskLevel.MEDIUM)
+    severity = Column(_string_enum(RiskLevel), default=RiskLevel.MEDIUM)
     confidence_score = Column(Float)  # 0.0 to 1.0
 
     # Resolution
@@ -195,6 +285,9 @@ class Conflict(Base):
     )
     conflicting_clause = relationship("Clause", foreign_keys=[conflicting_clause_id])
 
+    # Also serves lookups by clause_id alone
+    __table_args__ = (Index("ix_conflicts_pair", "clause_id", "conflicting_clause_id"),)
+
     def __repr__(self):
         return f"<Conflict(id={self.id}, type='{self.conflict_type}', severity={self.severity.value})>"
 
@@ -237,7 +330,7 @@ class ClauseReview(Base):
     clause_id = Column(Integer, ForeignKey("clauses.id"), nullable=False)
 
     # Review details
-    status = Column(SQLEnum(ReviewStatus), default=ReviewStatus.PENDING)
+    status = Column(_string_enum(ReviewStatus), default=ReviewStatus.PENDING)
     reviewer_name = Column(String(255))
     reviewer_email = Column(String(255))
 
@@ -256,6 +349,13 @@ class ClauseReview(Base):
         "DecisionLog", back_populates="review", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # Open review of a clause (assignment checks)
+        Index("ix_clause_reviews_clause_status", "clause_id", "status"),
+        # Pending reviews, optionally of one reviewer
+        Index("ix_clause_reviews_status_email", "status", "reviewer_email"),
+    )
+
     def __repr__(self):
         return f"<ClauseReview(id={self.id}, status={self.status.value}, reviewer='{self.reviewer_name}')>"
 
@@ -299,7 +399,8 @@ class QuestionAnswer(Base):
 
     # Question
     question = Column(Text, nullable=False)
-    question_embedding = Column(Text)  # For semantic search
+    question_embedding = Column(Text)  # Legacy JSON string
+    question_embedding_bytes = Column(LargeBinary)  # Raw float32, for semantic search
 
     # Answer
     answer = Column(Text, nullable=False)
@@ -310,23 +411,216 @@ class QuestionAnswer(Base):
 
     # Metadata
     asked_by = Column(String(255))
-    asked_at = Column(DateTime, default=datetime.utcnow)
-    contract_id = Column(Integer, ForeignKey("contracts.id"))
+    asked_at = Column(DateTime, default=datetime.utcnow, index=True)
+    contract_id = Column(Integer, ForeignKey("contracts.id"), index=True)
 
     def __repr__(self):
         return f"<QuestionAnswer(id={self.id}, confidence={self.confidence_score})>"
 
 
+class Report(Base):
+    """Audit report built in the background, tracked until it can be downloaded"""
+
+    __tablename__ = "reports"
+
+    id = Column(Integer, primary_key=True)
+    contract_id = Column(Integer, ForeignKey("contracts.id"), nullable=False)
+
+    # Request
+    format = Column(String(10), default="json")
+    include_conflicts = Column(Boolean, default=True)
+    include_reviews = Column(Boolean, default=True)
+
+    # Progress: PENDING, PROCESSING, COMPLETED or FAILED
+    status = Column(String(20), default="PENDING")
+    file_path = Column(String(1000))
+    error_message = Column(Text)
+
+    # Metadata
+    requested_by = Column(String(255))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<Report(id={self.id}, contract_id={self.contract_id}, status='{self.status}')>"
+
+
+class EmbeddingCache(Base):
+    """Embeddings of previously seen clause texts, keyed by text digest"""
+
+    __tablename__ = "embedding_cache"
+
+    text_hash = Column(LargeBinary(16), primary_key=True)  # clause_text_hash()
+    model_name = Column(String(255), primary_key=True)
+    embedding_bytes = Column(LargeBinary, nullable=False)  # Raw float32
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<EmbeddingCache(model='{self.model_name}')>"
+
+
 # Database initialization
 def init_db(database_url="sqlite:///./contracts.db"):
     """Initialize the database"""
     echo = os.getenv("SQLALCHEMY_ECHO", "False").lower() == "true"
-    engine = create_engine(database_url, echo=echo)
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        engine = create_engine(url, echo=echo)
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    else:
+        engine = create_engine(
+            url,
+            echo=echo,
+            pool_size=int(os.getenv("DB_POOL_SIZE", 10)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+            # Replace connections before server-side idle timeouts drop them
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 3600)),
+            pool_pre_ping=True,
+        )
     Base.metadata.create_all(engine)
+    _upgrade_schema(engine)
+
+    from models.vector_store import init_vector_store
+
+    init_vector_store(engine)
     return engine
 
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune every new SQLite connection
+
+    WAL lets readers proceed while an upload is writing, and synchronous=NORMAL
+    is durable under WAL while avoiding an fsync per commit.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA busy_timeout=5000")
+    finally:
+        cursor.close()
+
+
+def _upgrade_schema(engine):
+    """
+    Bring databases created by an older version up to date
+
+    create_all() only creates missing tables, so add any columns and
+    indexes introduced since, then backfill derived columns.
+    """
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    added = set()
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {preparer.quote(table.name)} "
+                        f"ADD COLUMN {preparer.quote(column.name)} {column_type}"
+                    )
+                )
+                added.add((table.name, column.name))
+
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+    if added:
+        from utils.embeddings import decode_embedding, encode_embedding
+
+        def reencode(json_text):
+            vector = decode_embedding(json_text=json_text)
+            return None if vector is None else encode_embedding(vector)
+
+        session = get_session(engine)
+        try:
+            if ("contracts", "name_root") in added:
+                _backfill(
+                    session, Contract, "name_root", Contract.name, contract_name_root
+                )
+            if ("contracts", "processing_status") in added:
+                session.query(Contract).update(
+                    {Contract.processing_status: "COMPLETED"},
+                    synchronize_session=False,
+                )
+            if ("clauses", "text_hash") in added:
+                _backfill(session, Clause, "text_hash", Clause.text, clause_text_hash)
+            if ("clauses", "embedding_bytes") in added:
+                _backfill(
+                    session,
+                    Clause,
+                    "embedding_bytes",
+                    Clause.embedding_vector,
+                    reencode,
+                )
+                session.query(Clause).filter(Clause.embedding_bytes.isnot(None)).update(
+                    {Clause.embedding_updated_at: datetime.utcnow()},
+                    synchronize_session=False,
+                )
+            if ("question_answers", "question_embedding_bytes") in added:
+                _backfill(
+                    session,
+                    QuestionAnswer,
+                    "question_embedding_bytes",
+                    QuestionAnswer.question_embedding,
+                    reencode,
+                )
+            session.commit()
+        finally:
+            session.close()
+
+
+# Rows read and updated per round trip by _backfill()
+_BACKFILL_BATCH = 1024
+
+
+def _backfill(session, model, column: str, source, compute):
+    """
+    Set column to compute(source) on every row where source is set
+
+    Rows are streamed (a server-side cursor on PostgreSQL) and updated by
+    primary key one batch at a time, so memory stays bounded by the batch
+    instead of holding every row of the table as an ORM object.
+    """
+    rows = session.execute(
+        select(model.id, source)
+        .where(source.isnot(None))
+        .execution_options(stream_results=True, yield_per=_BACKFILL_BATCH)
+    )
+    for batch in rows.partitions():
+        values = [(row_id, compute(value)) for row_id, value in batch]
+        values = [
+            {"id": row_id, column: value}
+            for row_id, value in values
+            if value is not None
+        ]
+        if values:
+            session.execute(update(model), values)
+
+
+# One session factory per engine, built on first use
+_session_factories: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
 def get_session(engine):
     """Get a database session"""
-    Session = sessionmaker(bind=engine)
-    return Session()
+    factory = _session_factories.get(engine)
+    if factory is None:
+        # Responses are built from objects after their commit; keeping them
+        # loaded avoids a refresh SELECT per object
+        factory = _session_factories.setdefault(
+            engine, sessionmaker(bind=engine, expire_on_commit=False)
+        )
+    return factory()
@@ -162,4 +162,4 @@ class AuditReportRequest(BaseModel):
     include_conflicts: bool = True
     include_decisions: bool = True
     include_reviews: bool = True
-    format: str = "pdf"  # pdf, json, excel
+    format: str = "pdf"  # pdf, json, jsonl (ndjson), excel
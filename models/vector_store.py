@@ -0,0 +1,157 @@
+"""
+Approximate nearest-neighbour search over clause embeddings with pgvector
+
+PostgreSQL only, and optional: it needs the pgvector Python package, the
+`vector` extension on the server and PGVECTOR_ENABLED. When active, every
+clause embedding is mirrored into an HNSW-indexed vector column, and QA
+retrieval asks the database for the nearest clauses instead of scoring the
+whole corpus in Python.
+"""
+
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import Column, Index, Integer, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import declarative_base
+
+from config import Config
+from utils.embeddings import decode_embedding
+
+try:
+    from pgvector.sqlalchemy import Vector  # type: ignore
+except ModuleNotFoundError:
+    Vector = None
+
+# Kept out of models.database.Base so other backends never create the table
+VectorBase = declarative_base()
+
+if Vector is not None:
+
+    class ClauseVector(VectorBase):
+        """Copy of a clause embedding in a pgvector column"""
+
+        __tablename__ = "clause_vectors"
+
+        clause_id = Column(Integer, primary_key=True, autoincrement=False)  # clauses.id
+        contract_id = Column(Integer, nullable=False, index=True)
+        embedding = Column(Vector(Config.PGVECTOR_DIMENSIONS), nullable=False)
+
+        __table_args__ = (
+            Index(
+                "ix_clause_vectors_hnsw",
+                embedding,
+                postgresql_using="hnsw",
+                postgresql_with={"m": 16, "ef_construction": 64},
+                postgresql_ops={"embedding": "vector_cosine_ops"},
+            ),
+        )
+
+else:
+    ClauseVector = None
+
+_enabled_engines = set()
+
+
+def init_vector_store(engine: Engine) -> bool:
+    """
+    Create the vector table on PostgreSQL if pgvector is enabled and available
+
+    Clauses extracted before the table existed are copied in on creation.
+
+    Returns:
+        Whether the vector store is active for this engine
+    """
+    if (
+        not Config.PGVECTOR_ENABLED
+        or ClauseVector is None
+        or engine.dialect.name != "postgresql"
+    ):
+        return False
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        created = not engine.dialect.has_table(conn, ClauseVector.__tablename__)
+        VectorBase.metadata.create_all(conn)
+        if created:
+            from models.database import Clause
+
+            rows = conn.execute(
+                select(
+                    Clause.id,
+                    Clause.contract_id,
+                    Clause.embedding_bytes,
+                    Clause.embedding_vector,
+                    Clause.embedding_scale,
+                ).where(
+                    (Clause.embedding_bytes.isnot(None))
+                    | (Clause.embedding_vector.isnot(None))
+                )
+                # Server-side cursor: copy in batches, not the whole corpus
+                .execution_options(stream_results=True, yield_per=1024)
+            )
+            for batch in rows.partitions():
+                _insert(
+                    conn,
+                    (
+                        (
+                            clause_id,
+                            contract_id,
+                            decode_embedding(blob, json_text, scale),
+                        )
+                        for clause_id, contract_id, blob, json_text, scale in batch
+                    ),
+                )
+
+    _enabled_engines.add(engine)
+    return True
+
+
+def vector_store_enabled(bind) -> bool:
+    """Whether init_vector_store() activated the store for this engine"""
+    return getattr(bind, "engine", bind) in _enabled_engines
+
+
+def _insert(conn, items: Iterable[Tuple[int, int, Optional[object]]]):
+    rows = [
+        {"clause_id": clause_id, "contract_id": contract_id, "embedding": vector}
+        for clause_id, contract_id, vector in items
+        if vector is not None and vector.shape[0] == Config.PGVECTOR_DIMENSIONS
+    ]
+    if rows:
+        conn.execute(ClauseVector.__table__.insert(), rows)
+
+
+def add_clause_vectors(session, clauses) -> None:
+    """Mirror the embeddings of newly saved clauses (ids must be assigned)"""
+    _insert(
+        session.connection(),
+        (
+            (
+                clause.id,
+                clause.contract_id,
+                decode_embedding(
+                    clause.embedding_bytes,
+                    clause.embedding_vector,
+                    clause.embedding_scale,
+                ),
+            )
+            for clause in clauses
+        ),
+    )
+
+
+def nearest_clauses(
+    session, vector, contract_id: Optional[int], limit: int
+) -> List[Tuple[int, float]]:
+    """
+    Clauses closest to vector by cosine distance, from the HNSW index
+
+    Returns:
+        (clause id, cosine similarity) pairs, most similar first
+    """
+    distance = ClauseVector.embedding.cosine_distance(vector)
+    query = select(ClauseVector.clause_id, 1 - distance)
+    if contract_id:
+        query = query.where(ClauseVector.contract_id == contract_id)
+    rows = session.execute(query.order_by(distance).limit(limit))
+    return [(clause_id, float(similarity)) for clause_id, similarity in rows]
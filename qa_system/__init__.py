@@ -2,6 +2,20 @@
 QA System package initialization
 """
 
-from .question_answering import QuestionAnsweringSystem
+import importlib
+
+# Exported names -> defining submodule, imported on first access (PEP 562)
+_LAZY_ATTRS = {
+    "QuestionAnsweringSystem": ".question_answering",
+}
 
 __all__ = ["QuestionAnsweringSystem"]
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
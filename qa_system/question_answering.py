@@ -5,12 +5,93 @@ Question Answering System with Evidence Retrieval
 import json
 import math
 import re
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Tuple, Optional
-from sqlalchemy.orm import Session
 
-from models.database import Clause, Contract, Conflict, QuestionAnswer
+import numpy as np
+from pydantic import TypeAdapter
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session, joinedload
+
+from models.database import (
+    Clause,
+    Conflict,
+    QuestionAnswer,
+    TEXT_SEARCH_CONFIG,
+)
+from models.vector_store import nearest_clauses, vector_store_enabled
 from models.schemas import EvidenceClause, AnswerResponse, ConflictResponse
+from qa_system import vector_index
+from qa_system.write_queue import get_write_queue
 from config import Config
+from utils.embeddings import decode_embedding, encode_embedding
+from utils.keyword_matcher import KeywordMatcher
+from utils.nlp_models import get_embedding_model
+
+# Full-text candidates fetched per requested evidence clause on PostgreSQL
+_FTS_CANDIDATES_PER_RESULT = 4
+# Vague terms flagged in evidence clauses, matched in one pass
+_AMBIGUITY_MATCHER = KeywordMatcher(
+    {
+        "AMBIGUOUS": [
+            "reasonable",
+            "appropriate",
+            "substantial",
+            "material",
+            "promptly",
+            "timely",
+            "best efforts",
+            "good faith",
+        ]
+    }
+)
+
+# Validate whole response lists in one pydantic-core call
+_EVIDENCE_ADAPTER = TypeAdapter(List[EvidenceClause])
+_CONFLICTS_ADAPTER = TypeAdapter(List[ConflictResponse])
+
+# Reciprocal Rank Fusion constant and the depth of each ranking it fuses
+_RRF_K = 60
+_RRF_DEPTH = 50
+
+# Clause embedding matrices per engine, keyed by contract id (None for all
+# contracts), most recently used last:
+# engine -> contract id -> (version, clause ids, matrix, index)
+_matrix_caches: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_matrix_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=Config.QA_EMBEDDING_CACHE_SIZE)
+def _encode_question(question: str):
+    """Encode a question with the shared model; repeated questions hit the cache"""
+    embedding = get_embedding_model().encode(
+        [question], convert_to_numpy=True, normalize_embeddings=True
+    )[0]
+    embedding.setflags(write=False)
+    return embedding
+
+
+def _top_k(ids: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k highest scores, best first, ties broken by id
+
+    Selects with np.partition in O(N) and only sorts the candidates, which
+    keeps the result identical to a full sort.
+    """
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if len(scores) > k:
+        # Everything scoring at least the k-th best; more than k only on ties
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((ids[candidates], -scores[candidates]))[:k]
+    return candidates[order]
 
 
 class QuestionAnsweringSystem:
@@ -19,17 +100,21 @@ class QuestionAnsweringSystem:
     def __init__(self, session: Session):
         self.session = session
         # sentence-transformers is optional; we can fall back to lexical matching.
-        # Catch ANY exception during model loading (import errors, version mismatches, etc.)
-        self.embedding_model = None
-        try:
-            from sentence_transformers import SentenceTransformer  # type: ignore
+        # The model is loaded once per process and shared between requests.
+        self.embedding_model = get_embedding_model()
 
-            self.embedding_model = SentenceTransformer(Config.TRANSFORMER_MODEL)
+    def _embed_question(self, question: str, fallback: str):
+        """Embedding for a question, or None if embeddings are unavailable"""
+        if self.embedding_model is None:
+            return None
+        try:
+            return _encode_question(question)
         except Exception as e:
+            # Any runtime issues (e.g., transformers/hf hub mismatches) should not break QA.
             print(
-                f"Warning: Could not load embedding model ({type(e).__name__}: {e}). "
-                "QA will use lexical matching instead."
+                f"Warning: embedding encode failed ({type(e).__name__}: {e}). {fallback}"
             )
+            return None
 
     @staticmethod
     def _tokenize(text: str) -> List[str]:
@@ -40,28 +125,68 @@ class QuestionAnsweringSystem:
     @classmethod
     def _lexical_similarity(cls, a: str, b: str) -> float:
         """Cosine similarity over binary token presence (0..1)."""
-        ta = set(cls._tokenize(a))
-        tb = set(cls._tokenize(b))
+        return cls._token_similarity(set(cls._tokenize(a)), set(cls._tokenize(b)))
+
+    @staticmethod
+    def _token_similarity(ta: set, tb: set) -> float:
         if not ta or not tb:
             return 0.0
         inter = len(ta & tb)
         return inter / math.sqrt(len(ta) * len(tb))
 
+    @classmethod
+    def _clause_tokens(cls, text: str, normalized_text: Optional[str]) -> set:
+        """
+        Token set of a clause, from the normalized text stored at extraction
+
+        normalized_text is already lowercased with every other character
+        replaced by a space, so plain ASCII text only needs a split. Other
+        text still goes through the tokenizer, which gives the same tokens
+        as tokenizing the original.
+        """
+        if normalized_text is None:
+            return set(cls._tokenize(text))
+        if normalized_text.isascii():
+            return set(normalized_text.split())
+        return set(cls._tokenize(normalized_text))
+
+    def _clause_scores(self, question: str, rows) -> np.ndarray:
+        """Lexical similarity of the question to (text, normalized_text) rows"""
+        question_tokens = set(self._tokenize(question))
+        return np.array(
+            [
+                self._token_similarity(
+                    question_tokens, self._clause_tokens(r.text, r.normalized_text)
+                )
+                for r in rows
+            ],
+            dtype=np.float32,
+        )
+
     @staticmethod
-    def _cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
-        """Cosine similarity for same-length numeric vectors (0..1-ish)."""
-        if not vec1 or not vec2 or len(vec1) != len(vec2):
-            return 0.0
-        dot = 0.0
-        n1 = 0.0
-        n2 = 0.0
-        for a, b in zip(vec1, vec2):
-            dot += a * b
-            n1 += a * a
-            n2 += b * b
-        if n1 <= 0.0 or n2 <= 0.0:
-            return 0.0
-        return dot / math.sqrt(n1 * n2)
+    def _cosine_scores(
+        query: np.ndarray, vectors: List[Optional[np.ndarray]]
+    ) -> np.ndarray:
+        """
+        Cosine similarity of query against each vector in one matrix product
+
+        Returns:
+            float32 array with one score per vector; 0 where the vector is
+            None, has a different length or is all zeros
+        """
+        query = np.asarray(query, dtype=np.float32)
+        scores = np.zeros(len(vectors), dtype=np.float32)
+        rows = [
+            i for i, v in enumerate(vectors) if v is not None and v.shape == query.shape
+        ]
+        if not rows:
+            return scores
+
+        matrix = np.vstack([vectors[i] for i in rows])
+        dots = matrix @ query
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores[rows] = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+        return scores
 
     def answer_question(
         self,
@@ -84,8 +209,15 @@ class QuestionAnsweringSystem:
         """
         print(f"Processing question: {question}")
 
+        # Encode the question once for retrieval and storage
+        question_embedding = self._embed_question(
+            question, "Falling back to lexical matching."
+        )
+
         # Step 1: Retrieve relevant clauses
-        evidence_clauses = self._retrieve_evidence(question, contract_id, top_k)
+        evidence_clauses = self._retrieve_evidence(
+            question, contract_id, top_k, question_embedding
+        )
 
         if not evidence_clauses:
             return AnswerResponse(
@@ -111,7 +243,13 @@ class QuestionAnsweringSystem:
 
         # Step 6: Save Q&A to database
         self._save_qa(
-            question, answer, confidence, evidence_clauses, asked_by, contract_id
+            question,
+            answer,
+            confidence,
+            evidence_clauses,
+            asked_by,
+            contract_id,
+            question_embedding,
         )
 
         # Step 7: Format response
@@ -127,73 +265,335 @@ class QuestionAnsweringSystem:
         return response
 
     def _retrieve_evidence(
-        self, question: str, contract_id: Optional[int], top_k: int
+        self,
+        question: str,
+        contract_id: Optional[int],
+        top_k: int,
+        question_embedding=None,
     ) -> List[EvidenceClause]:
-        """Retrieve most relevant clauses for the question"""
-        question_embedding = None
-        if self.embedding_model is not None:
-            try:
-                question_embedding = self.embedding_model.encode([question])[0]
-            except Exception as e:
-                # Any runtime issues (e.g., transformers/hf hub mismatches) should not break QA.
-                print(
-                    f"Warning: embedding encode failed ({type(e).__name__}: {e}). Falling back to lexical matching."
+        """
+        Retrieve most relevant clauses for the question
+
+        question_embedding is the question's vector from _embed_question(),
+        or None to rank lexically.
+        """
+        # Fuse semantic and full-text rankings where full-text search exists
+        hybrid = (
+            question_embedding is not None
+            and Config.QA_HYBRID_SEARCH
+            and self.session.get_bind().dialect.name == "postgresql"
+        )
+
+        # Score clauses (embedding-based if available, else lexical)
+        if question_embedding is not None:
+            ids, scores = self._embedding_scores(
+                question,
+                question_embedding,
+                contract_id,
+                max(top_k, _RRF_DEPTH) if hybrid else top_k,
+            )
+        else:
+            ids, scores = self._lexical_scores(question, contract_id, top_k)
+
+        if not len(ids):
+            return []
+
+        # Sort by similarity (ties by clause id) and take top k
+        if hybrid:
+            top_ids, top_scores = self._fuse_full_text(
+                question, contract_id, ids, scores, top_k
+            )
+        else:
+            top = _top_k(ids, scores, top_k)
+            top_ids, top_scores = ids[top].tolist(), scores[top].tolist()
+
+        clauses = {
+            clause.id: clause
+            for clause in self.session.query(Clause)
+            .options(joinedload(Clause.contract))
+            .filter(Clause.id.in_(top_ids))
+        }
+        top_clauses = [
+            (clauses[clause_id], score)
+            for clause_id, score in zip(top_ids, top_scores)
+            if clause_id in clauses
+        ]
+
+        # Format as EvidenceClause objects, validated in one pass
+        return _EVIDENCE_ADAPTER.validate_python(
+            [
+                {
+                    "clause_id": clause.id,
+                    "section_number": clause.section_number,
+                    "text": clause.text,
+                    "relevance_score": float(score),
+                    "clause_type": clause.clause_type.value,
+                    # Contract was loaded with the clause
+                    "document_name": (
+                        clause.contract.name if clause.contract else "Unknown"
+                    ),
+                    "page_number": clause.page_number,
+                }
+                for clause, score in top_clauses
+            ]
+        )
+
+    def _embedding_scores(
+        self,
+        question: str,
+        question_embedding,
+        contract_id: Optional[int],
+        top_k: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cosine similarity of the question to the clauses in scope
+
+        Clauses with an embedding are scored against the cached matrix in one
+        product, or with pgvector only the top k nearest are fetched from its
+        index; the rest are scored lexically.
+
+        Returns:
+            (clause ids, scores)
+        """
+        query_vec = np.asarray(question_embedding, dtype=np.float32)
+        if vector_store_enabled(self.session.get_bind()):
+            nearest = nearest_clauses(self.session, query_vec, contract_id, top_k)
+            ids = np.array([clause_id for clause_id, _ in nearest], dtype=np.int64)
+            scores = np.array([score for _, score in nearest], dtype=np.float32)
+        else:
+            ids, matrix, index = self._embedding_matrix(contract_id, query_vec.shape[0])
+            norm = np.linalg.norm(query_vec)
+            dim = index.d if index is not None else matrix.shape[1]
+            if dim != query_vec.shape[0] or norm <= 0:
+                scores = np.zeros(len(ids), dtype=np.float32)
+            elif index is not None:
+                # Only the top k come back from a faiss index
+                positions, scores = vector_index.search(
+                    index, query_vec / norm, min(top_k, len(ids))
                 )
-                question_embedding = None
+                ids = ids[positions]
+            else:
+                scores = matrix @ (query_vec / norm)
 
-        # Get all clauses (filtered by contract if specified)
-        query = self.session.query(Clause)
+        query = self.session.query(
+            Clause.id, Clause.text, Clause.normalized_text
+        ).filter(Clause.embedding_bytes.is_(None), Clause.embedding_vector.is_(None))
         if contract_id:
             query = query.filter(Clause.contract_id == contract_id)
+        rows = query.all()
+        if rows:
+            ids = np.concatenate([ids, np.array([r.id for r in rows], dtype=np.int64)])
+            scores = np.concatenate([scores, self._clause_scores(question, rows)])
 
-        clauses = query.all()
+        return ids, scores
 
-        if not clauses:
-            return []
+    def _embedding_matrix(
+        self, contract_id: Optional[int], dim: Optional[int] = None
+    ) -> Tuple:
+        """
+        Ids and L2-normalized embedding rows of the clauses that have one
 
-        # Calculate similarities (embedding-based if available, else lexical)
-        clause_scores = []
-        for clause in clauses:
-            similarity = 0.0
-            if question_embedding is not None and clause.embedding_vector:
-                try:
-                    clause_vec = json.loads(clause.embedding_vector)
-                    similarity = self._cosine_similarity(
-                        list(map(float, question_embedding)),
-                        list(map(float, clause_vec)),
-                    )
-                except (ValueError, TypeError, json.JSONDecodeError):
-                    similarity = 0.0
-            else:
-                similarity = self._lexical_similarity(question, clause.text)
+        The matrix is decoded once per engine and shared between requests.
+        The clause count, highest id and latest embedding_updated_at identify
+        a version; the cached matrix is rebuilt when any of them changes, so
+        added, deleted and re-embedded clauses are all picked up. Unusable
+        embeddings, and ones from a model with another dimension, get a zero
+        row.
 
-            clause_scores.append((clause, similarity))
+        With faiss installed the rows may instead be kept in a faiss index
+        (see qa_system.vector_index): 8-bit quantized for int8 storage, or an
+        HNSW graph; those can also be loaded from disk instead of rebuilt,
+        unless the saved one does not have dimension dim.
 
-        # Sort by similarity and take top k
-        clause_scores.sort(key=lambda x: x[1], reverse=True)
-        top_clauses = clause_scores[:top_k]
+        Returns:
+            (clause ids, read-only float32 matrix with one row per id or None,
+            faiss index over the same rows or None)
+        """
+        filters = [
+            or_(Clause.embedding_bytes.isnot(None), Clause.embedding_vector.isnot(None))
+        ]
+        if contract_id:
+            filters.append(Clause.contract_id == contract_id)
 
-        # Format as EvidenceClause objects
-        evidence = []
-        for clause, score in top_clauses:
-            # Get contract name
-            contract = (
-                self.session.query(Contract).filter_by(id=clause.contract_id).first()
+        count, max_id, revision = (
+            self.session.query(
+                func.count(Clause.id),
+                func.max(Clause.id),
+                func.max(Clause.embedding_updated_at),
+            )
+            .filter(*filters)
+            .one()
+        )
+        version = (count, max_id, revision)
+        with _matrix_cache_lock:
+            cache = self._matrix_cache()
+            cached = cache.get(contract_id)
+            if cached is not None and cached[0] == version:
+                cache.move_to_end(contract_id)
+                return cached[1:]
+
+        engine = self._engine()
+        kind = vector_index.index_kind()
+        if kind != "exact":
+            saved = vector_index.load_index(engine, contract_id, version, kind, dim)
+            if saved is not None:
+                ids, index = saved
+                ids.setflags(write=False)
+                return self._cache_matrix(contract_id, version, ids, None, index)
+
+        ids = np.empty(count, dtype=np.int64)
+        matrix = None
+        n = 0
+        rows = (
+            self.session.query(
+                Clause.id,
+                Clause.embedding_bytes,
+                Clause.embedding_vector,
+                Clause.embedding_scale,
             )
+            .filter(*filters, Clause.id <= (max_id or 0))
+            # Newest first, so the matrix takes the current model's dimension
+            .order_by(Clause.id.desc())
+            .yield_per(1024)
+        )
+        for clause_id, blob, json_text, scale in rows:
+            vector = decode_embedding(blob, json_text, scale)
+            if vector is not None:
+                if matrix is None:
+                    matrix = np.zeros((count, vector.shape[0]), dtype=np.float32)
+                if vector.shape[0] == matrix.shape[1]:
+                    matrix[n] = vector
+            ids[n] = clause_id
+            n += 1
+
+        ids = ids[:n]
+        matrix = (
+            matrix[:n] if matrix is not None else np.zeros((n, 0), dtype=np.float32)
+        )
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        ids.setflags(write=False)
+        matrix.setflags(write=False)
+
+        index = None
+        if kind != "exact" and n and matrix.shape[1]:
+            index = vector_index.build_index(matrix, kind)
+            vector_index.save_index(engine, contract_id, version, kind, ids, index)
+            matrix = None
+
+        return self._cache_matrix(contract_id, version, ids, matrix, index)
+
+    def _engine(self):
+        bind = self.session.get_bind()
+        return getattr(bind, "engine", bind)
+
+    def _matrix_cache(self) -> OrderedDict:
+        """Matrix cache of this session's engine; call with the lock held"""
+        engine = self._engine()
+        cache = _matrix_caches.get(engine)
+        if cache is None:
+            cache = _matrix_caches[engine] = OrderedDict()
+        return cache
+
+    def _cache_matrix(self, contract_id: Optional[int], version, ids, matrix, index):
+        with _matrix_cache_lock:
+            cache = self._matrix_cache()
+            cache[contract_id] = (version, ids, matrix, index)
+            cache.move_to_end(contract_id)
+            while len(cache) > Config.QA_MATRIX_CACHE_SIZE:
+                cache.popitem(last=False)
+
+        return ids, matrix, index
+
+    def _lexical_scores(
+        self, question: str, contract_id: Optional[int], top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lexical similarity of the question to the clauses in scope
 
-            evidence.append(
-                EvidenceClause(
-                    clause_id=clause.id,
-                    section_number=clause.section_number,
-                    text=clause.text,
-                    relevance_score=float(score),
-                    clause_type=clause.clause_type.value,
-                    document_name=contract.name if contract else "Unknown",
-                    page_number=clause.page_number,
-                )
+        On PostgreSQL only full-text matches are scored when there are any.
+
+        Returns:
+            (clause ids, scores)
+        """
+        query = self.session.query(Clause.id, Clause.text, Clause.normalized_text)
+        if contract_id:
+            query = query.filter(Clause.contract_id == contract_id)
+
+        rows = None
+        if self.session.get_bind().dialect.name == "postgresql":
+            rows = self._full_text_candidates(
+                query, question, top_k * _FTS_CANDIDATES_PER_RESULT
             )
+        if not rows:
+            rows = query.all()
 
-        return evidence
+        ids = np.array([r.id for r in rows], dtype=np.int64)
+        return ids, self._clause_scores(question, rows)
+
+    def _fuse_full_text(
+        self,
+        question: str,
+        contract_id: Optional[int],
+        ids: np.ndarray,
+        scores: np.ndarray,
+        top_k: int,
+    ) -> Tuple[List[int], List[float]]:
+        """
+        Rerank the best semantic matches by Reciprocal Rank Fusion with the
+        PostgreSQL full-text ranking
+
+        Each clause scores 1 / (_RRF_K + rank) for its rank in each list, so
+        clauses quoting the question's exact terms rise even when their
+        embeddings are only moderately close.
+
+        Returns:
+            (clause ids, cosine similarities) of the fused top k, best first
+        """
+        semantic = _top_k(ids, scores, _RRF_DEPTH)
+        similarity = dict(zip(ids[semantic].tolist(), scores[semantic].tolist()))
+
+        query = self.session.query(Clause.id)
+        if contract_id:
+            query = query.filter(Clause.contract_id == contract_id)
+        full_text = [
+            row.id for row in self._full_text_candidates(query, question, _RRF_DEPTH)
+        ]
+
+        fused: Dict[int, float] = {}
+        for ranking in (list(similarity), full_text):
+            for rank, clause_id in enumerate(ranking, 1):
+                fused[clause_id] = fused.get(clause_id, 0.0) + 1.0 / (_RRF_K + rank)
+
+        top_ids = sorted(fused, key=lambda clause_id: (-fused[clause_id], clause_id))
+        top_ids = top_ids[:top_k]
+        for clause_id in top_ids:
+            if clause_id not in similarity:
+                # Found by full-text search only; use its score if it has one
+                match = np.flatnonzero(ids == clause_id)
+                similarity[clause_id] = float(scores[match[0]]) if len(match) else 0.0
+        return top_ids, [similarity[clause_id] for clause_id in top_ids]
+
+    def _full_text_candidates(self, query, question: str, limit: int) -> List:
+        """
+        Rows sharing a term with the question, best full-text rank first
+
+        Uses the GIN index on clause text so only matching rows are loaded and
+        scored. Empty when no clause matches (e.g. the question is all stop
+        words); the caller then scores every clause as before.
+        """
+        tokens = self._tokenize(question)
+        if not tokens:
+            return []
+
+        vector = func.to_tsvector(TEXT_SEARCH_CONFIG, Clause.text)
+        ts_query = func.to_tsquery(TEXT_SEARCH_CONFIG, " | ".join(tokens))
+        return (
+            query.filter(vector.bool_op("@@")(ts_query))
+            .order_by(func.ts_rank(vector, ts_query).desc())
+            .limit(limit)
+            .all()
+        )
 
     def _generate_answer(
         self, question: str, evidence_clauses: List[EvidenceClause]
@@ -212,22 +612,24 @@ class QuestionAnsweringSystem:
 
         most_relevant = evidence_clauses[0]
 
-        # Build answer
-        answer = f"Based on {most_relevant.document_name}"
+        # Build answer from parts and join once
+        parts = [f"Based on {most_relevant.document_name}"]
         if most_relevant.section_number:
-            answer += f", Section {most_relevant.section_number}"
-        answer += ":\n\n"
+            parts.append(f", Section {most_relevant.section_number}")
+        parts.append(":\n\n")
 
         # Include the clause text
-        answer += f'"{most_relevant.text}"'
+        parts.append(f'"{most_relevant.text}"')
 
         # Add supporting evidence if available
         if len(evidence_clauses) > 1:
-            answer += f"\n\nThis is further supported by {len(evidence_clauses) - 1} related clause(s)"
-            answer += " in "
-            unique_docs = set(e.document_name for e in evidence_clauses[1:])
-            answer += ", ".join(unique_docs)
-            answer += "."
+            # Sorted, so the same evidence always yields the same answer
+            unique_docs = sorted({e.document_name for e in evidence_clauses[1:]})
+            parts.append(
+                f"\n\nThis is further supported by {len(evidence_clauses) - 1} "
+                f"related clause(s) in {', '.join(unique_docs)}."
+            )
+        answer = "".join(parts)
 
         # Confidence is based on relevance score of top clause
         confidence = most_relevant.relevance_score
@@ -238,20 +640,9 @@ class QuestionAnsweringSystem:
         """Detect ambiguities in evidence clauses"""
         ambiguities = []
 
-        ambiguous_terms = [
-            "reasonable",
-            "appropriate",
-            "substantial",
-            "material",
-            "promptly",
-            "timely",
-            "best efforts",
-            "good faith",
-        ]
-
         for evidence in evidence_clauses:
-            text_lower = evidence.text.lower()
-            found_terms = [term for term in ambiguous_terms if term in text_lower]
+            # One automaton sweep instead of a substring probe per term
+            found_terms = _AMBIGUITY_MATCHER.find(evidence.text.lower())["AMBIGUOUS"]
 
             if found_terms:
                 ambig_msg = f"Section {evidence.section_number or 'Unknown'} contains ambiguous terms: {', '.join(found_terms)}"
@@ -263,33 +654,29 @@ class QuestionAnsweringSystem:
         self, evidence_clauses: List[EvidenceClause]
     ) -> List[ConflictResponse]:
         """Check for conflicts between evidence clauses"""
-        conflicts = []
-
         clause_ids = [e.clause_id for e in evidence_clauses]
 
-        # Query conflicts involving these clauses
-        db_conflicts = (
-            self.session.query(Conflict)
-            .filter(Conflict.clause_id.in_(clause_ids))
-            .filter(Conflict.conflicting_clause_id.in_(clause_ids))
-            .all()
-        )
-
-        for conflict in db_conflicts:
-            conflicts.append(
-                ConflictResponse(
-                    id=conflict.id,
-                    clause_id=conflict.clause_id,
-                    conflicting_clause_id=conflict.conflicting_clause_id,
-                    conflict_type=conflict.conflict_type,
-                    description=conflict.description,
-                    severity=conflict.severity.value,
-                    confidence_score=conflict.confidence_score,
-                    is_resolved=conflict.is_resolved,
-                )
+        # Query conflicts between these clauses, as plain rows: the ORM
+        # objects would only be copied into responses
+        rows = self.session.execute(
+            select(
+                Conflict.id,
+                Conflict.clause_id,
+                Conflict.conflicting_clause_id,
+                Conflict.conflict_type,
+                Conflict.description,
+                Conflict.severity,
+                Conflict.confidence_score,
+                Conflict.is_resolved,
+            ).where(
+                Conflict.clause_id.in_(clause_ids),
+                Conflict.conflicting_clause_id.in_(clause_ids),
             )
+        )
 
-        return conflicts
+        return _CONFLICTS_ADAPTER.validate_python(
+            [{**row._mapping, "severity": row.severity.value} for row in rows]
+        )
 
     def _needs_review(
         self,
@@ -330,18 +717,9 @@ class QuestionAnsweringSystem:
         evidence_clauses: List[EvidenceClause],
         asked_by: str,
         contract_id: Optional[int],
+        question_embedding=None,
     ):
-        """Save question-answer pair to database"""
-        # Generate embedding for question (optional)
-        question_embedding = None
-        if self.embedding_model is not None:
-            try:
-                question_embedding = self.embedding_model.encode([question])[0]
-            except Exception as e:
-                print(
-                    f"Warning: embedding encode failed ({type(e).__name__}: {e}). Skipping question embedding storage."
-                )
-                question_embedding = None
+        """Save question-answer pair (and its embedding, if any) to database"""
 
         # Format evidence for storage
         evidence_json = json.dumps(
@@ -351,61 +729,73 @@ class QuestionAnsweringSystem:
             ]
         )
 
-        qa = QuestionAnswer(
-            question=question,
-            question_embedding=(
-                json.dumps(list(map(float, question_embedding)))
+        row = {
+            "question": question,
+            "question_embedding_bytes": (
+                encode_embedding(question_embedding)
                 if question_embedding is not None
                 else None
             ),
-            answer=answer,
-            confidence_score=confidence,
-            evidence_clauses=evidence_json,
-            asked_by=asked_by,
-            contract_id=contract_id,
-        )
-
-        self.session.add(qa)
-        self.session.commit()
+            "answer": answer,
+            "confidence_score": confidence,
+            "evidence_clauses": evidence_json,
+            "asked_by": asked_by,
+            "asked_at": datetime.utcnow(),
+            "contract_id": contract_id,
+        }
+
+        engine = self.session.get_bind()
+        if Config.QA_BATCH_WRITES and engine.url.database not in (None, "", ":memory:"):
+            # Written by a background thread within QA_WRITE_INTERVAL
+            get_write_queue(engine).put(row)
+        else:
+            self.session.add(QuestionAnswer(**row))
+            self.session.commit()
 
     def get_similar_questions(self, question: str, top_k: int = 3) -> List[Dict]:
         """Find similar previously asked questions"""
-        question_embedding = None
-        if self.embedding_model is not None:
-            try:
-                question_embedding = self.embedding_model.encode([question])[0]
-            except Exception as e:
-                print(
-                    f"Warning: embedding encode failed ({type(e).__name__}: {e}). Falling back to lexical matching."
-                )
-                question_embedding = None
+        question_embedding = self._embed_question(
+            question, "Falling back to lexical matching."
+        )
 
-        # Get all previous Q&As
-        previous_qas = self.session.query(QuestionAnswer).all()
+        # Get all previous Q&As; only what scoring needs is loaded for each
+        previous_qas = self.session.query(
+            QuestionAnswer.id,
+            QuestionAnswer.question,
+            QuestionAnswer.question_embedding_bytes,
+            QuestionAnswer.question_embedding,
+        ).all()
 
         if not previous_qas:
             return []
 
         # Calculate similarities (embedding-based if possible, else lexical)
-        similarities = []
-        for qa in previous_qas:
-            similarity = 0.0
-            if question_embedding is not None and qa.question_embedding:
-                try:
-                    qa_vec = json.loads(qa.question_embedding)
-                    similarity = self._cosine_similarity(
-                        list(map(float, question_embedding)),
-                        list(map(float, qa_vec)),
-                    )
-                except (ValueError, TypeError, json.JSONDecodeError):
-                    similarity = 0.0
+        ids = np.array([qa.id for qa in previous_qas], dtype=np.int64)
+        scores = np.zeros(len(previous_qas), dtype=np.float32)
+        vectors = [None] * len(previous_qas)
+        for i, qa in enumerate(previous_qas):
+            if question_embedding is not None and (
+                qa.question_embedding_bytes or qa.question_embedding
+            ):
+                vectors[i] = decode_embedding(
+                    qa.question_embedding_bytes, qa.question_embedding
+                )
             else:
-                similarity = self._lexical_similarity(question, qa.question)
-
-            similarities.append((qa, similarity))
-
-        # Sort and take top k
-        similarities.sort(key=lambda x: x[1], reverse=True)
+                scores[i] = self._lexical_similarity(question, qa.question)
+
+        if question_embedding is not None:
+            # Lexically scored rows have no vector, so add 0 here
+            scores += self._cosine_scores(question_embedding, vectors)
+
+        # Sort (ties by id) and take top k, then load those rows in full
+        top = _top_k(ids, scores, top_k)
+        matches = {
+            qa.id: qa
+            for qa in self.session.query(QuestionAnswer).filter(
+                QuestionAnswer.id.in_(ids[top].tolist())
+            )
+        }
+        similarities = [(matches[ids[i]], scores[i]) for i in top if ids[i] in matches]
 
         return [
             {
@@ -414,5 +804,5 @@ class QuestionAnsweringSystem:
                 "similarity": float(score),
                 "asked_at": qa.asked_at.isoformat() if qa.asked_at else None,
             }
-            for qa, score in similarities[:top_k]
+            for qa, score in similarities
         ]
@@ -0,0 +1,154 @@
+"""
+In-process faiss indexes over the QA clause embedding matrix
+
+faiss is optional. Without it, or with QA_VECTOR_INDEX=exact, QA scores the
+normalized float32 matrix with one matrix product: exact, and fast up to
+tens of thousands of clauses. Larger corpora can use an HNSW graph, searched
+in roughly logarithmic time, and int8 storage maps to an 8-bit scalar
+quantizer. Built indexes can be persisted in QA_INDEX_FOLDER so a restart
+loads them instead of re-decoding and re-indexing every embedding. Their
+file names identify the database, the embedding model and the clause
+version, so an index is never loaded for data it was not built from.
+"""
+
+import glob
+import hashlib
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from config import Config
+
+try:
+    import faiss  # type: ignore
+except ModuleNotFoundError:
+    faiss = None
+
+
+def index_kind() -> str:
+    """Index type to build: "exact" (plain matrix), "int8" or "hnsw" """
+    kind = Config.QA_VECTOR_INDEX
+    if faiss is None or kind not in ("auto", "int8", "hnsw"):
+        return "exact"
+    if kind == "auto":
+        return "int8" if Config.EMBEDDING_QUANTIZATION == "int8" else "exact"
+    return kind
+
+
+def build_index(matrix: np.ndarray, kind: str):
+    """
+    Index the rows of a normalized embedding matrix for inner-product search
+
+    Returns:
+        A faiss index whose positions match the matrix rows, or None for
+        "exact" (score the matrix directly)
+    """
+    dim = matrix.shape[1]
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, Config.QA_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    elif kind == "int8":
+        index = faiss.IndexScalarQuantizer(
+            dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+        )
+        index.train(matrix)
+    else:
+        return None
+
+    index.add(matrix)
+    return index
+
+
+def search(index, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top k rows of an index for one normalized query vector
+
+    Returns:
+        (row positions, inner products), best first
+    """
+    params = None
+    if isinstance(index, faiss.IndexHNSW):
+        # efSearch below k would return fewer than k neighbours
+        params = faiss.SearchParametersHNSW(efSearch=max(Config.QA_HNSW_EF_SEARCH, k))
+    scores, positions = index.search(query.reshape(1, -1), k, params=params)
+    keep = positions[0] >= 0
+    return positions[0][keep], scores[0][keep]
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def _prefix(engine, scope: Optional[int]) -> Optional[str]:
+    """File name prefix of the indexes of one database and clause scope"""
+    if not Config.QA_INDEX_FOLDER:
+        return None
+    url = engine.url
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory databases don't outlive the process; neither should
+        # their indexes
+        return None
+    database = _digest(url.render_as_string(hide_password=True))
+    return os.path.join(Config.QA_INDEX_FOLDER, f"clauses-{database}-{scope or 'all'}-")
+
+
+def _path(engine, scope: Optional[int], version: Tuple, kind: str) -> Optional[str]:
+    prefix = _prefix(engine, scope)
+    if prefix is None:
+        return None
+    count, max_id, revision = version
+    revision = f"{revision:%Y%m%d%H%M%S%f}" if revision else 0
+    model = _digest(f"{Config.TRANSFORMER_MODEL}:{Config.EMBEDDING_MODEL_FILE}")
+    return f"{prefix}{count}-{max_id}-{revision}-{model}-{kind}"
+
+
+def load_index(
+    engine, scope: Optional[int], version: Tuple, kind: str, dim: Optional[int]
+):
+    """
+    Read a persisted index for this database, clause scope and version, if any
+
+    Args:
+        dim: Dimension of the query vectors; an index of another dimension
+            is not loaded
+
+    Returns:
+        (clause ids, index), or None when nothing matching was saved
+    """
+    path = _path(engine, scope, version, kind)
+    if path is None or not os.path.exists(path + ".faiss"):
+        return None
+    try:
+        ids, index = np.load(path + ".ids.npy"), faiss.read_index(path + ".faiss")
+    except (OSError, RuntimeError, ValueError):
+        return None
+    if dim is not None and index.d != dim:
+        return None
+    return ids, index
+
+
+def save_index(engine, scope: Optional[int], version: Tuple, kind: str, ids, index):
+    """Persist an index and its clause ids, replacing older versions of the scope"""
+    path = _path(engine, scope, version, kind)
+    if path is None:
+        return
+
+    stale = glob.glob(_prefix(engine, scope) + "*")
+    try:
+        os.makedirs(Config.QA_INDEX_FOLDER, exist_ok=True)
+        # Write under temporary names so readers never see a partial file
+        np.save(path + ".ids.tmp.npy", ids)
+        faiss.write_index(index, path + ".tmp.faiss")
+        os.replace(path + ".ids.tmp.npy", path + ".ids.npy")
+        os.replace(path + ".tmp.faiss", path + ".faiss")
+    except (OSError, RuntimeError) as e:
+        # Only a cache: QA keeps working from the in-memory index
+        print(f"Warning: could not save QA index ({type(e).__name__}: {e}).")
+        return
+
+    for old in stale:
+        if not old.startswith(path):
+            try:
+                os.remove(old)
+            except OSError:
+                pass
@@ -0,0 +1,89 @@
+"""
+Batched persistence of answered questions
+
+Saving a question used to cost its own INSERT and commit inside the request.
+Rows are now queued and a background thread writes whatever has accumulated
+(up to a batch, or after a short interval) as one multi-row INSERT in a
+single transaction.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+
+from config import Config
+from models.database import QuestionAnswer
+
+logger = logging.getLogger(__name__)
+
+
+class QAWriteQueue:
+    """Background writer for QuestionAnswer rows"""
+
+    def __init__(self, engine: Engine, batch_size: int = 1000, interval: float = 0.25):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: "queue.Queue[Dict]" = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="qa-write-queue", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, row: Dict):
+        """Queue the column values of one QuestionAnswer row"""
+        self._queue.put(row)
+
+    def flush(self):
+        """Block until every queued row has been written"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(insert(QuestionAnswer), batch)
+            except Exception:
+                logger.exception("Failed to save %d question(s)", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+_queues: Dict[Engine, QAWriteQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_queue(engine: Engine) -> QAWriteQueue:
+    """Return the write queue for an engine, starting it on first use"""
+    with _queues_lock:
+        write_queue = _queues.get(engine)
+        if write_queue is None:
+            write_queue = _queues[engine] = QAWriteQueue(
+                engine, interval=Config.QA_WRITE_INTERVAL
+            )
+        return write_queue
+
+
+@atexit.register
+def _flush_all():
+    # Don't drop answers still waiting in a queue at interpreter exit
+    for write_queue in list(_queues.values()):
+        write_queue.flush()
@@ -1,22 +1,71 @@
 """
-Report generation for audit-friendly exports (JSON-only fallback)
+Report generation for audit-friendly exports (JSON and JSON Lines)
 """
 
+import gzip
 import json
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterator, Dict
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
+try:
+    import orjson  # type: ignore
+except ModuleNotFoundError:
+    orjson = None
+
 from models.database import (
     Contract,
     Clause,
+    ClauseType,
     Conflict,
     ClauseReview,
     DecisionLog,
     Interpretation,
+    ReviewStatus,
     RiskLevel,
 )
 
+# Rows fetched per round trip while streaming a report
+_BATCH_SIZE = 1000
+
+# gzip level for compressed reports: most of the size reduction of level 9
+# for a fraction of the CPU time
+_GZIP_LEVEL = 4
+
+
+# Enum column member -> stored value, looked up once per record field
+# instead of an attribute access and a None check
+_ENUM_VALUES = {
+    member: member.value
+    for enum in (ClauseType, RiskLevel, ReviewStatus)
+    for member in enum
+}
+_enum_value = _ENUM_VALUES.get
+
+
+def _isoformat(obj) -> str:
+    """json.dumps default: datetimes as ISO 8601, as orjson writes them"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _encode(obj, indent: bool = False) -> str:
+    """
+    Encode obj as JSON, with orjson when it is installed
+
+    indent=True matches json.dumps(indent=2); otherwise the encoding is
+    compact. orjson writes non-ASCII characters as UTF-8 instead of \\u
+    escapes, so reports are written as UTF-8. Datetimes are encoded as
+    isoformat() strings either way; orjson formats them natively.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+    if indent:
+        return json.dumps(obj, indent=2, default=_isoformat)
+    return json.dumps(obj, separators=(",", ":"), default=_isoformat)
+
 
 class AuditReportGenerator:
     """Generate comprehensive audit reports (JSON format)"""
@@ -33,103 +82,303 @@ class AuditReportGenerator:
         json_path = output_path.replace(".pdf", ".json")
         return self.generate_json_report(contract_id, json_path)
 
-    def generate_json_report(self, contract_id: int, output_path: str) -> str:
-        """Generate a JSON audit report"""
+    def generate_json_report(
+        self,
+        contract_id: int,
+        output_path: str,
+        indent: bool = True,
+        compress: bool = False,
+    ) -> str:
+        """
+        Generate a JSON audit report
+
+        Args:
+            indent: Pretty-print for human readers; False writes compact JSON
+            compress: Write the file gzip-compressed, adding a ".gz" suffix to
+                output_path if it has none
+
+        Returns:
+            Path of the written file
+        """
+        if compress:
+            if not output_path.endswith(".gz"):
+                output_path += ".gz"
+            f = gzip.open(
+                output_path, "wt", encoding="utf-8", compresslevel=_GZIP_LEVEL
+            )
+        else:
+            f = open(output_path, "w", encoding="utf-8")
+
+        # Write JSON, streaming the clause/conflict/review arrays from the
+        # database instead of building the whole report first
+        with f:
+            f.writelines(self.stream_json_report(contract_id, indent=indent))
+
+        return output_path
+
+    def stream_json_report(
+        self,
+        contract_id: int,
+        include_conflicts: bool = True,
+        include_reviews: bool = True,
+        indent: bool = True,
+    ) -> Iterator[str]:
+        """
+        Encode a report as JSON chunks while reading it from the database
+
+        The header, then the clause, conflict and review arrays, indented
+        like json.dumps(indent=2), or compact with indent=False. Records are
+        fetched in batches as the chunks are consumed, so memory does not
+        grow with the contract. The session must stay open until the
+        iterator is exhausted.
+        """
+        report = self._report_header(contract_id)
+        sections = [("clauses", self._clause_records(contract_id))]
+        if include_conflicts:
+            sections.append(("conflicts", self._conflict_records(contract_id)))
+        if include_reviews:
+            sections.append(("reviews", self._review_records(contract_id)))
+        if not indent:
+            return self._iter_compact_json(report, sections)
+        return self._iter_json(report, sections)
+
+    def generate_jsonl_report(
+        self,
+        contract_id: int,
+        output_path: str,
+        include_conflicts: bool = True,
+        include_reviews: bool = True,
+    ) -> str:
+        """Generate a JSON Lines (NDJSON) audit report"""
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.writelines(
+                self.stream_jsonl_report(
+                    contract_id, include_conflicts, include_reviews
+                )
+            )
+
+        return output_path
+
+    def stream_jsonl_report(
+        self,
+        contract_id: int,
+        include_conflicts: bool = True,
+        include_reviews: bool = True,
+    ) -> Iterator[str]:
+        """
+        Encode a report as JSON Lines while reading it from the database
+
+        Every line is an object tagged with its "record" kind: first a
+        "header" with the report date, contract and summary, then one line
+        per "clause", "conflict" or "review". Consumers can parse it a line
+        at a time instead of loading the whole document. The session must
+        stay open until the iterator is exhausted.
+        """
+        header = self._report_header(contract_id)
+        sections = [("clause", self._clause_records(contract_id))]
+        if include_conflicts:
+            sections.append(("conflict", self._conflict_records(contract_id)))
+        if include_reviews:
+            sections.append(("review", self._review_records(contract_id)))
+        return self._iter_jsonl(header, sections)
+
+    def _report_header(self, contract_id: int) -> Dict:
+        """Report date, contract details and summary counts"""
         contract = self.session.query(Contract).filter_by(id=contract_id).first()
         if not contract:
             raise ValueError(f"Contract {contract_id} not found")
 
-        # Gather all data
-        clauses = self.session.query(Clause).filter_by(contract_id=contract_id).all()
-        conflicts = (
-            self.session.query(Conflict)
-            .join(Clause, Clause.id == Conflict.clause_id)
-            .filter(Clause.contract_id == contract_id)
-            .all()
-        )
-        reviews = (
-            self.session.query(ClauseReview)
-            .join(Clause, Clause.id == ClauseReview.clause_id)
-            .filter(Clause.contract_id == contract_id)
-            .all()
-        )
-
-        # Build report structure
-        report = {
-            "report_date": datetime.utcnow().isoformat(),
+        return {
+            "report_date": datetime.utcnow(),
             "contract": {
                 "id": contract.id,
                 "name": contract.name,
                 "version": contract.version,
                 "file_path": contract.file_path,
                 "is_amendment": contract.is_amendment,
-                "created_at": contract.created_at.isoformat()
-                if contract.created_at
-                else None,
-                "updated_at": contract.updated_at.isoformat()
-                if contract.updated_at
-                else None,
+                "created_at": contract.created_at,
+                "updated_at": contract.updated_at,
             },
-            "summary": {
-                "total_clauses": len(clauses),
-                "clauses_by_type": self._count_by_type(clauses),
-                "high_risk_count": sum(
-                    1
-                    for c in clauses
-                    if c.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]
-                ),
-                "conflicts_detected": len(conflicts),
-                "reviews_pending": sum(
-                    1 for r in reviews if r.status.value == "PENDING"
+            "summary": self._summary(contract_id),
+        }
+
+    def _summary(self, contract_id: int) -> Dict:
+        """Summary counts, computed in SQL in two queries"""
+        # Clause counts per type, with the high-risk ones counted alongside
+        clauses_by_type = {}
+        total_clauses = high_risk_count = 0
+        rows = (
+            self.session.query(
+                Clause.clause_type,
+                func.count(Clause.id),
+                func.count(Clause.id).filter(
+                    Clause.risk_level.in_([RiskLevel.HIGH, RiskLevel.CRITICAL])
                 ),
-            },
-            "clauses": [
-                {
-                    "id": c.id,
-                    "section": c.section_number,
-                    "title": c.title,
-                    "text": c.text[:200] + "..." if len(c.text) > 200 else c.text,
-                    "type": c.clause_type.value if c.clause_type else None,
-                    "risk_level": c.risk_level.value if c.risk_level else None,
-                    "page": c.page_number,
-                }
-                for c in clauses
-            ],
-            "conflicts": [
-                {
-                    "id": cf.id,
-                    "clause_id": cf.clause_id,
-                    "conflicting_clause_id": cf.conflicting_clause_id,
-                    "type": cf.conflict_type,
-                    "severity": cf.severity.value if cf.severity else None,
-                    "confidence": cf.confidence_score,
-                    "is_resolved": cf.is_resolved,
-                }
-                for cf in conflicts
-            ],
-            "reviews": [
-                {
-                    "id": r.id,
-                    "clause_id": r.clause_id,
-                    "status": r.status.value if r.status else None,
-                    "reviewer": r.reviewer_name,
-                    "assigned_at": r.assigned_at.isoformat() if r.assigned_at else None,
-                    "reviewed_at": r.reviewed_at.isoformat() if r.reviewed_at else None,
-                }
-                for r in reviews
-            ],
+            )
+            .filter(Clause.contract_id == contract_id)
+            .group_by(Clause.clause_type)
+            .order_by(Clause.clause_type)
+        )
+        for clause_type, count, high_risk in rows:
+            clauses_by_type[_enum_value(clause_type) or "UNKNOWN"] = count
+            total_clauses += count
+            high_risk_count += high_risk
+
+        # Conflict and pending review counts as scalar subqueries of one SELECT
+        conflicts_detected, reviews_pending = self.session.query(
+            select(func.count(Conflict.id))
+            .join(Clause, Clause.id == Conflict.clause_id)
+            .where(Clause.contract_id == contract_id)
+            .scalar_subquery(),
+            select(func.count(ClauseReview.id))
+            .join(Clause, Clause.id == ClauseReview.clause_id)
+            .where(
+                Clause.contract_id == contract_id,
+                ClauseReview.status == ReviewStatus.PENDING,
+            )
+            .scalar_subquery(),
+        ).one()
+
+        return {
+            "total_clauses": total_clauses,
+            "clauses_by_type": clauses_by_type,
+            "high_risk_count": high_risk_count,
+            "conflicts_detected": conflicts_detected,
+            "reviews_pending": reviews_pending,
         }
 
-        # Write JSON
-        with open(output_path, "w") as f:
-            json.dump(report, f, indent=2)
+    # Records are built from plain column rows: no ORM objects (identity
+    # map, attribute instrumentation) for data that is only serialized.
+    # Ordered by id, so the output does not depend on the index used
 
-        return output_path
+    def _clause_records(self, contract_id: int) -> Iterator[Dict]:
+        rows = (
+            self.session.query(
+                Clause.id,
+                Clause.section_number,
+                Clause.title,
+                Clause.text,
+                Clause.clause_type,
+                Clause.risk_level,
+                Clause.page_number,
+            )
+            .filter_by(contract_id=contract_id)
+            .order_by(Clause.id)
+            .yield_per(_BATCH_SIZE)
+        )
+        for clause_id, section, title, text, clause_type, risk_level, page in rows:
+            yield {
+                "id": clause_id,
+                "section": section,
+                "title": title,
+                "text": text[:200] + "..." if len(text) > 200 else text,
+                "type": _enum_value(clause_type),
+                "risk_level": _enum_value(risk_level),
+                "page": page,
+            }
 
-    def _count_by_type(self, clauses: List[Clause]) -> Dict[str, int]:
-        """Count clauses by type"""
-        counts = {}
-        for clause in clauses:
-            clause_type = clause.clause_type.value if clause.clause_type else "UNKNOWN"
-            counts[clause_type] = counts.get(clause_type, 0) + 1
-        return counts
+    def _conflict_records(self, contract_id: int) -> Iterator[Dict]:
+        rows = (
+            self.session.query(
+                Conflict.id,
+                Conflict.clause_id,
+                Conflict.conflicting_clause_id,
+                Conflict.conflict_type,
+                Conflict.severity,
+                Conflict.confidence_score,
+                Conflict.is_resolved,
+            )
+            .join(Clause, Clause.id == Conflict.clause_id)
+            .filter(Clause.contract_id == contract_id)
+            .order_by(Conflict.id)
+            .yield_per(_BATCH_SIZE)
+        )
+        for (
+            conflict_id,
+            clause_id,
+            conflicting_clause_id,
+            conflict_type,
+            severity,
+            confidence,
+            is_resolved,
+        ) in rows:
+            yield {
+                "id": conflict_id,
+                "clause_id": clause_id,
+                "conflicting_clause_id": conflicting_clause_id,
+                "type": conflict_type,
+                "severity": _enum_value(severity),
+                "confidence": confidence,
+                "is_resolved": is_resolved,
+            }
+
+    def _review_records(self, contract_id: int) -> Iterator[Dict]:
+        rows = (
+            self.session.query(
+                ClauseReview.id,
+                ClauseReview.clause_id,
+                ClauseReview.status,
+                ClauseReview.reviewer_name,
+                ClauseReview.assigned_at,
+                ClauseReview.reviewed_at,
+            )
+            .join(Clause, Clause.id == ClauseReview.clause_id)
+            .filter(Clause.contract_id == contract_id)
+            .order_by(ClauseReview.id)
+            .yield_per(_BATCH_SIZE)
+        )
+        for review_id, clause_id, status, reviewer, assigned_at, reviewed_at in rows:
+            yield {
+                "id": review_id,
+                "clause_id": clause_id,
+                "status": _enum_value(status),
+                "reviewer": reviewer,
+                "assigned_at": assigned_at,
+                "reviewed_at": reviewed_at,
+            }
+
+    @staticmethod
+    def _iter_json(report: Dict, sections) -> Iterator[str]:
+        """
+        Encode report followed by (key, records) arrays like json.dump(indent=2)
+
+        Records are encoded one at a time and indented to their depth;
+        encoded JSON strings never contain a raw newline, so re-indenting
+        by replacing newlines is safe.
+        """
+        # Reopen the encoded (non-empty) object to append the arrays
+        yield _encode(report, indent=True)[: -len("\n}")]
+        for key, records in sections:
+            yield f",\n  {_encode(key)}: ["
+            empty = True
+            for record in records:
+                yield "\n    " if empty else ",\n    "
+                yield _encode(record, indent=True).replace("\n", "\n    ")
+                empty = False
+            yield "]" if empty else "\n  ]"
+        yield "\n}"
+
+    @staticmethod
+    def _iter_compact_json(report: Dict, sections) -> Iterator[str]:
+        """Encode report followed by (key, records) arrays without whitespace"""
+        yield _encode(report)[:-1]
+        for key, records in sections:
+            yield f",{_encode(key)}:["
+            separator = ""
+            for record in records:
+                yield separator + _encode(record)
+                separator = ","
+            yield "]"
+        yield "}"
+
+    @staticmethod
+    def _iter_jsonl(header: Dict, sections) -> Iterator[str]:
+        """
+        Encode the header and each (record type, records) record as one line
+
+        The tag is "record", as clause and conflict records already use "type".
+        """
+        yield _encode({"record": "header", **header}) + "\n"
+        for record_type, records in sections:
+            for record in records:
+                yield _encode({"record": record_type, **record}) + "\n"
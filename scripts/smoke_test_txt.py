@@ -14,21 +14,18 @@ import json
 import os
 import sys
 
-
-def _repo_root() -> str:
-    here = os.path.dirname(os.path.abspath(__file__))
-    return os.path.abspath(os.path.join(here, ".."))
+_REPO_ROOT = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+)
 
 
 def main() -> int:
-    sys.path.insert(0, _repo_root())
+    sys.path.insert(0, _REPO_ROOT)
 
     # Importing app initializes Config dirs and DB engine.
     from app import app  # noqa: WPS433
 
-    sample_path = os.path.join(
-        _repo_root(), "sample_contracts", "service_agreement.txt"
-    )
+    sample_path = os.path.join(_REPO_ROOT, "sample_contracts", "service_agreement.txt")
     if not os.path.exists(sample_path):
         raise FileNotFoundError(sample_path)
 
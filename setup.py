@@ -8,22 +8,55 @@ import subprocess
 
 
 def run_command(command, description):
-    """Run a command and handle errors"""
+    """
+    Run a command (an argument list, no shell) and handle errors
+
+    Output is printed as it arrives instead of after the command finishes.
+    """
     print(f"\n{'=' * 60}")
     print(f"{description}")
     print(f"{'=' * 60}")
 
     try:
-        result = subprocess.run(
-            command, shell=True, check=True, capture_output=True, text=True
-        )
-        print(result.stdout)
-        return True
-    except subprocess.CalledProcessError as e:
+        with subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        ) as process:
+            for line in process.stdout:
+                print(line, end="")
+    except OSError as e:
         print(f"Error: {e}")
-        print(e.stderr)
         return False
 
+    if process.returncode != 0:
+        print(f"Error: {command[0]} exited with status {process.returncode}")
+        return False
+    return True
+
+
+def start_command(command):
+    """Start a command in the background, collecting its output"""
+    return subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+
+
+def finish_command(process, description):
+    """Wait for a command from start_command() and print its output"""
+    output, _ = process.communicate()
+    print(f"\n{'=' * 60}")
+    print(f"{description}")
+    print(f"{'=' * 60}")
+    print(output, end="")
+
+    if process.returncode != 0:
+        print(f"Error: {process.args[0]} exited with status {process.returncode}")
+        return False
+    return True
+
 
 def main():
     """Main setup function"""
@@ -39,7 +72,9 @@ def main():
     # Step 2: Create virtual environment
     if not os.path.exists("venv"):
         print("\nCreating virtual environment...")
-        if not run_command("python -m venv venv", "Creating virtual environment"):
+        if not run_command(
+            [sys.executable, "-m", "venv", "venv"], "Creating virtual environment"
+        ):
             return
     else:
         print("\nVirtual environment already exists")
@@ -58,20 +93,25 @@ def main():
     print(f"  {activate_cmd}")
 
     # Step 4: Upgrade pip
-    run_command(f"{pip_cmd} install --upgrade pip", "Upgrading pip")
+    run_command([pip_cmd, "install", "--upgrade", "pip"], "Upgrading pip")
 
     # Step 5: Install dependencies
     if not run_command(
-        f"{pip_cmd} install -r requirements.txt", "Installing dependencies"
+        [pip_cmd, "install", "-r", "requirements.txt"], "Installing dependencies"
     ):
         print("\nWARNING: Some dependencies failed to install")
         print("You may need to install them manually")
 
-    # Step 6: Download spaCy model
-    print("\nDownloading spaCy language model...")
-    run_command(
-        f"{python_cmd} -m spacy download en_core_web_lg", "Downloading spaCy model"
-    )
+    # Step 6: Download spaCy model. It needs spaCy from step 5, but nothing
+    # below needs the model, so the download runs alongside steps 7-9
+    print("\nDownloading spaCy language model in the background...")
+    try:
+        spacy_download = start_command(
+            [python_cmd, "-m", "spacy", "download", "en_core_web_lg"]
+        )
+    except OSError as e:
+        print(f"Error: {e}")
+        spacy_download = None
 
     # Step 7: Create necessary directories
     print("\nCreating directories...")
@@ -93,10 +133,13 @@ def main():
     # Step 9: Initialize database
     print("\nInitializing database...")
     run_command(
-        f'{python_cmd} -c "from models.database import init_db; init_db()"',
+        [python_cmd, "-c", "from models.database import init_db; init_db()"],
         "Initializing database",
     )
 
+    if spacy_download is not None:
+        finish_command(spacy_download, "Downloading spaCy model")
+
     # Final instructions
     print("\n" + "=" * 60)
     print("Setup Complete!")
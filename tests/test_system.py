@@ -52,6 +52,7 @@ class TestDatabase:
 
         assert contract.id is not None
         assert contract.name == "Test Contract"
+        assert contract.name_root == "Test"
 
     def test_create_clause(self, test_session):
         """Test creating a clause"""
@@ -72,6 +73,7 @@ class TestDatabase:
         assert clause.id is not None
         assert clause.text == "This is a test clause."
         assert clause.contract_id == contract.id
+        assert len(clause.text_hash) == 16
 
 
 class TestClauseExtractor:
@@ -135,6 +137,71 @@ class TestConflictDetector:
         score = detector._check_contradiction(text1, text2)
         assert score > 0.5  # Should detect contradiction
 
+    def test_internal_conflicts(self, test_session):
+        """Test detecting contradictions between similar clauses"""
+        import json
+        from analyzers.conflict_detector import ConflictDetector
+
+        contract = Contract(name="Test", version="1.0")
+        test_session.add(contract)
+        test_session.commit()
+
+        embedding = json.dumps([0.1, 0.2, 0.3])
+        for text in [
+            "The party shall provide services.",
+            "The party shall not provide services.",
+        ]:
+            test_session.add(
+                Clause(
+                    contract_id=contract.id,
+                    text=text,
+                    clause_type=ClauseType.OBLIGATION,
+                    embedding_vector=embedding,
+                )
+            )
+        test_session.commit()
+
+        conflicts = ConflictDetector(test_session).detect_conflicts(contract.id)
+
+        assert len(conflicts) == 1
+        assert conflicts[0].conflict_type == "CONTRADICTION"
+
+    def test_pairs_reported_once(self, test_session):
+        """Test that an amendment pair is not reported as a version conflict too"""
+        import json
+        from analyzers.conflict_detector import ConflictDetector
+
+        parent = Contract(name="Test", version="1.0")
+        test_session.add(parent)
+        test_session.commit()
+        amendment = Contract(
+            name="Test Amendment",
+            version="1.1",
+            is_amendment=True,
+            parent_contract_id=parent.id,
+        )
+        test_session.add(amendment)
+        test_session.commit()
+
+        embedding = json.dumps([0.1, 0.2, 0.3])
+        for contract, text in [
+            (parent, "The party shall provide services."),
+            (amendment, "The party shall not provide services."),
+        ]:
+            test_session.add(
+                Clause(
+                    contract_id=contract.id,
+                    text=text,
+                    clause_type=ClauseType.OBLIGATION,
+                    embedding_vector=embedding,
+                )
+            )
+        test_session.commit()
+
+        conflicts = ConflictDetector(test_session).detect_conflicts(amendment.id)
+
+        assert [c.conflict_type for c in conflicts] == ["OVERRIDE"]
+
 
 class TestAmbiguityDetector:
     """Test ambiguity detection"""
@@ -163,6 +230,136 @@ class TestAmbiguityDetector:
         assert score > 0
 
 
+class TestKeywordMatcher:
+    """Test single-pass keyword matching"""
+
+    def test_overlapping_terms(self):
+        """Test that overlapping keywords are all reported"""
+        from utils.keyword_matcher import KeywordMatcher
+
+        matcher = KeywordMatcher(
+            {
+                "AMBIGUOUS": ["reasonable", "commercially reasonable"],
+                "NEGATION": ["not", "no"],
+            }
+        )
+        hits = matcher.find("use commercially reasonable efforts, not notice")
+
+        assert hits["AMBIGUOUS"] == ["reasonable", "commercially reasonable"]
+        assert hits["NEGATION"] == ["not", "no"]
+
+
+class TestEmbeddings:
+    """Test embedding storage"""
+
+    def test_binary_roundtrip(self):
+        """Test that binary embeddings decode to the stored values"""
+        from utils.embeddings import encode_embedding, decode_embedding
+
+        blob = encode_embedding([0.5, -1.0, 2.0])
+
+        assert len(blob) == 12
+        assert decode_embedding(blob).tolist() == [0.5, -1.0, 2.0]
+        assert decode_embedding(json_text="[0.5, -1.0]").tolist() == [0.5, -1.0]
+        assert decode_embedding() is None
+
+    def test_int8_roundtrip(self):
+        """Test that int8 embeddings decode close to the original values"""
+        import numpy as np
+        from utils.embeddings import quantize_embedding, decode_embedding
+
+        vector = np.array([0.5, -1.0, 0.25, 0.0], dtype=np.float32)
+        blob, scale = quantize_embedding(vector)
+
+        assert len(blob) == 4
+        assert np.allclose(decode_embedding(blob, scale=scale), vector, atol=scale)
+
+
+class TestQuestionAnswering:
+    """Test QA retrieval"""
+
+    def test_matrix_cache_per_database(self):
+        """Test that cached embedding matrices follow their own database"""
+        import json
+        from sqlalchemy.orm import sessionmaker
+        from models.database import Base
+        from qa_system.question_answering import QuestionAnsweringSystem
+
+        sessions = []
+        for embedding in ([1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0]):
+            engine = create_engine("sqlite:///:memory:")
+            Base.metadata.create_all(engine)
+            session = sessionmaker(bind=engine)()
+            contract = Contract(name="Test", version="1.0")
+            session.add(contract)
+            session.commit()
+            session.add(
+                Clause(
+                    contract_id=contract.id,
+                    text="Test clause",
+                    embedding_vector=json.dumps(embedding),
+                )
+            )
+            session.commit()
+            sessions.append(session)
+
+        try:
+            first, second = (QuestionAnsweringSystem(s) for s in sessions)
+            assert first._embedding_matrix(1)[1].tolist() == [[1.0, 0.0, 0.0, 0.0]]
+            assert second._embedding_matrix(1)[1].tolist() == [[0.0, 1.0, 0.0, 0.0]]
+
+            # Re-embedding a clause in place invalidates the cached matrix
+            clause = sessions[1].query(Clause).one()
+            clause.embedding_vector = json.dumps([0.0, 0.0, 1.0, 0.0])
+            sessions[1].commit()
+            assert second._embedding_matrix(1)[1].tolist() == [[0.0, 0.0, 1.0, 0.0]]
+            assert first._embedding_matrix(1)[1].tolist() == [[1.0, 0.0, 0.0, 0.0]]
+        finally:
+            for session in sessions:
+                session.close()
+
+    def test_saved_index_per_database(self, tmp_path, monkeypatch):
+        """Test that a persisted faiss index is only loaded where it fits"""
+        import numpy as np
+
+        pytest.importorskip("faiss")
+        from config import Config
+        from qa_system import vector_index
+
+        monkeypatch.setattr(Config, "QA_INDEX_FOLDER", str(tmp_path / "indexes"))
+        first = create_engine(f"sqlite:///{tmp_path / 'first.db'}")
+        second = create_engine(f"sqlite:///{tmp_path / 'second.db'}")
+
+        matrix = np.eye(4, dtype=np.float32)
+        ids = np.arange(1, 5)
+        version = (4, 4, None)
+        index = vector_index.build_index(matrix, "hnsw")
+        vector_index.save_index(first, 1, version, "hnsw", ids, index)
+
+        saved_ids, saved = vector_index.load_index(first, 1, version, "hnsw", 4)
+        assert saved_ids.tolist() == ids.tolist()
+        assert saved.d == 4
+        assert vector_index.load_index(second, 1, version, "hnsw", 4) is None
+        assert vector_index.load_index(first, 1, version, "hnsw", 3) is None
+
+
+class TestPasswords:
+    """Test password hashing"""
+
+    def test_verify_new_and_legacy_hashes(self):
+        """Test that new hashes and werkzeug hashes both verify"""
+        from werkzeug.security import generate_password_hash
+        from utils.passwords import hash_password, verify_password
+
+        new_hash = hash_password("secret")
+        legacy_hash = generate_password_hash("secret")
+
+        assert verify_password(new_hash, "secret")
+        assert not verify_password(new_hash, "wrong")
+        assert verify_password(legacy_hash, "secret")
+        assert not verify_password(legacy_hash, "wrong")
+
+
 class TestReviewWorkflow:
     """Test review workflow"""
 
@@ -195,6 +392,194 @@ class TestReviewWorkflow:
         assert review.id is not None
         assert review.reviewer_name == "Test Reviewer"
 
+    def test_assign_without_commit(self, test_session):
+        """Test assigning several clauses and committing them together"""
+        from workflows.review_workflow import ReviewWorkflow
+        from models.database import ClauseReview, DecisionLog
+
+        contract = Contract(name="Test", version="1.0")
+        test_session.add(contract)
+        test_session.commit()
+
+        clauses = [
+            Clause(contract_id=contract.id, text=f"Clause {i}") for i in range(2)
+        ]
+        test_session.add_all(clauses)
+        test_session.commit()
+
+        workflow = ReviewWorkflow(test_session)
+        reviews = [
+            workflow.assign_for_review(
+                clause_id=clause.id,
+                reviewer_name="Test Reviewer",
+                reviewer_email="test@example.com",
+                commit=False,
+            )
+            for clause in clauses
+        ]
+        assert all(review.id is not None for review in reviews)
+
+        test_session.rollback()
+        assert test_session.query(ClauseReview).count() == 0
+        assert test_session.query(DecisionLog).count() == 0
+
+        reviews = [
+            workflow.assign_for_review(
+                clause_id=clause.id,
+                reviewer_name="Test Reviewer",
+                reviewer_email="test@example.com",
+                commit=False,
+            )
+            for clause in clauses
+        ]
+        test_session.commit()
+
+        logs = test_session.query(DecisionLog).order_by(DecisionLog.id).all()
+        assert test_session.query(ClauseReview).count() == 2
+        assert [log.review_id for log in logs] == [review.id for review in reviews]
+        assert all(log.action == "ASSIGNED" for log in logs)
+
+    def test_batch_assign_high_risk(self, test_session):
+        """Test batch assignment, pending reviews and workflow status"""
+        from workflows.review_workflow import ReviewWorkflow
+        from models.database import ClauseReview, DecisionLog, ReviewStatus
+
+        contract = Contract(name="Test", version="1.0")
+        test_session.add(contract)
+        test_session.commit()
+
+        risk_levels = [RiskLevel.HIGH, RiskLevel.LOW, RiskLevel.CRITICAL]
+        clauses = [
+            Clause(
+                contract_id=contract.id,
+                text=f"Clause {i}",
+                clause_type=ClauseType.PAYMENT,
+                risk_level=risk_level,
+            )
+            for i, risk_level in enumerate(risk_levels)
+        ]
+        test_session.add_all(clauses)
+        test_session.commit()
+
+        workflow = ReviewWorkflow(test_session)
+        reviews = workflow.batch_assign_high_risk(
+            contract.id, "Test Reviewer", "test@example.com"
+        )
+
+        assert [r.clause_id for r in reviews] == [clauses[0].id, clauses[2].id]
+        logs = test_session.query(DecisionLog).order_by(DecisionLog.id).all()
+        assert [log.review_id for log in logs] == [r.id for r in reviews]
+        assert all(log.action == "ASSIGNED" for log in logs)
+
+        # Clauses already in review are not assigned again
+        again = workflow.batch_assign_high_risk(
+            contract.id, "Test Reviewer", "test@example.com"
+        )
+        assert [r.id for r in again] == [r.id for r in reviews]
+        assert test_session.query(ClauseReview).count() == 2
+        assert test_session.query(DecisionLog).count() == 2
+
+        workflow.submit_review(reviews[0].id, ReviewStatus.APPROVED)
+
+        pending = workflow.get_pending_reviews("test@example.com")
+        assert [p["review_id"] for p in pending] == [reviews[1].id]
+        assert pending[0]["contract_name"] == "Test"
+        assert workflow.get_pending_reviews("other@example.com") == []
+
+        status = workflow.get_workflow_status(contract.id)
+        assert status.total_clauses == 3
+        assert status.in_review == 1
+        assert status.approved == 1
+        assert status.pending_review == 0
+
+
+class TestReportGenerator:
+    """Test audit report export"""
+
+    @staticmethod
+    def _create_contract(session):
+        from models.database import ClauseReview, Conflict
+
+        contract = Contract(name="Test", version="1.0")
+        session.add(contract)
+        session.commit()
+
+        clauses = [
+            Clause(
+                contract_id=contract.id,
+                text=f"Clause {i} é",
+                clause_type=[ClauseType.PAYMENT, ClauseType.GENERAL][i % 2],
+                risk_level=[RiskLevel.HIGH, RiskLevel.LOW][i % 2],
+            )
+            for i in range(3)
+        ]
+        session.add_all(clauses)
+        session.commit()
+
+        session.add(
+            Conflict(
+                clause_id=clauses[0].id,
+                conflicting_clause_id=clauses[1].id,
+                conflict_type="CONTRADICTION",
+                description="Test conflict",
+                severity=RiskLevel.HIGH,
+                confidence_score=0.8,
+            )
+        )
+        session.add(ClauseReview(clause_id=clauses[0].id, reviewer_name="Reviewer"))
+        session.commit()
+        return contract
+
+    def test_compact_gzip_report(self, test_session, tmp_path):
+        """Test that a compact gzip report holds the same data as a pretty one"""
+        import gzip
+        import json
+        from reports.report_generator import AuditReportGenerator
+
+        contract = self._create_contract(test_session)
+        generator = AuditReportGenerator(test_session)
+
+        pretty_path = generator.generate_json_report(
+            contract.id, str(tmp_path / "report.json")
+        )
+        compact_path = generator.generate_json_report(
+            contract.id, str(tmp_path / "report.json"), indent=False, compress=True
+        )
+
+        assert compact_path.endswith(".json.gz")
+        with open(pretty_path, encoding="utf-8") as f:
+            pretty = json.load(f)
+        with gzip.open(compact_path, "rt", encoding="utf-8") as f:
+            compact = json.load(f)
+        pretty.pop("report_date")
+        compact.pop("report_date")
+        assert compact == pretty
+        assert [c["id"] for c in pretty["clauses"]] == [1, 2, 3]
+        assert pretty["summary"]["high_risk_count"] == 2
+
+    def test_jsonl_report(self, test_session, tmp_path):
+        """Test that JSON Lines records match the header summary"""
+        import json
+        from collections import Counter
+        from reports.report_generator import AuditReportGenerator
+
+        contract = self._create_contract(test_session)
+        path = AuditReportGenerator(test_session).generate_jsonl_report(
+            contract.id, str(tmp_path / "report.jsonl")
+        )
+
+        with open(path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+
+        header = lines[0]
+        counts = Counter(line["record"] for line in lines[1:])
+        assert header["record"] == "header"
+        assert counts["clause"] == header["summary"]["total_clauses"] == 3
+        assert counts["conflict"] == header["summary"]["conflicts_detected"] == 1
+        assert counts["review"] == 1
+        assert header["summary"]["reviews_pending"] == 1
+        assert header["summary"]["clauses_by_type"] == {"GENERAL": 1, "PAYMENT": 2}
+
 
 def test_health_check():
     """Test API health check"""
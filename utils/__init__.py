@@ -9,6 +9,11 @@ from .helpers import (
     format_clause_reference,
     truncate_text,
 )
+from .keyword_matcher import KeywordMatcher
+from .embeddings import encode_embedding, decode_embedding, quantize_embedding
+from .passwords import hash_password, verify_password
+from .nlp_models import get_embedding_model, get_spacy_model
+from .storage import store_upload
 
 __all__ = [
     "calculate_file_hash",
@@ -16,4 +21,13 @@ __all__ = [
     "sanitize_filename",
     "format_clause_reference",
     "truncate_text",
+    "KeywordMatcher",
+    "encode_embedding",
+    "decode_embedding",
+    "quantize_embedding",
+    "hash_password",
+    "verify_password",
+    "get_embedding_model",
+    "get_spacy_model",
+    "store_upload",
 ]
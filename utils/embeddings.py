@@ -0,0 +1,73 @@
+"""
+Compact storage for clause embeddings
+
+Embeddings are stored as raw little-endian float32 bytes. Decoding is a
+zero-copy np.frombuffer instead of parsing a JSON list of floats.
+
+Optionally they are quantized to int8 with a per-vector scale (a quarter of
+the bytes). The scale is stored alongside the bytes and marks the int8 form;
+it cancels out of cosine similarity.
+"""
+
+import json
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+EMBEDDING_DTYPE = np.dtype("<f4")
+QUANTIZED_DTYPE = np.dtype("i1")
+
+
+def encode_embedding(vector: Iterable[float]) -> bytes:
+    """Serialize an embedding vector to float32 bytes"""
+    return np.ascontiguousarray(vector, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def quantize_embedding(vector: Iterable[float]) -> Tuple[bytes, float]:
+    """
+    Serialize an embedding vector to int8 bytes with a per-vector scale
+
+    Returns:
+        (int8 bytes, scale) where value ~= int8 * scale
+    """
+    arr = np.asarray(vector, dtype=np.float32)
+    peak = float(np.max(np.abs(arr))) if arr.size else 0.0
+    scale = peak / 127.0 if peak > 0 else 1.0
+    quantized = np.clip(np.rint(arr / scale), -127, 127).astype(QUANTIZED_DTYPE)
+    return quantized.tobytes(), scale
+
+
+def decode_embedding(
+    blob: Optional[bytes] = None,
+    json_text: Optional[str] = None,
+    scale: Optional[float] = None,
+) -> Optional[np.ndarray]:
+    """
+    Decode a stored embedding, preferring the binary form
+
+    Args:
+        blob: float32 bytes written by encode_embedding, or int8 bytes
+            written by quantize_embedding
+        json_text: Legacy JSON list of floats
+        scale: Scale returned by quantize_embedding; set only for int8 blobs
+
+    Returns:
+        1-D float32 array (a read-only view when decoded from float32 bytes),
+        or None if there is no usable embedding
+    """
+    arr = None
+    if blob:
+        if scale is not None:
+            arr = np.frombuffer(blob, dtype=QUANTIZED_DTYPE).astype(np.float32)
+            arr *= scale
+        elif len(blob) % EMBEDDING_DTYPE.itemsize == 0:
+            arr = np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+    elif json_text:
+        try:
+            arr = np.asarray(json.loads(json_text), dtype=np.float32)
+        except (TypeError, ValueError):
+            arr = None
+
+    if arr is None or arr.ndim != 1 or arr.size == 0:
+        return None
+    return arr
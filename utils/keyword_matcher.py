@@ -0,0 +1,89 @@
+"""
+Single-pass keyword matching over a fixed vocabulary
+
+pyahocorasick is optional: when its C extension is available every keyword is
+found in one O(N + matches) sweep of the text. Without it we fall back to
+per-keyword substring probes, which give identical results.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+try:
+    import ahocorasick  # type: ignore
+except ModuleNotFoundError:
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """Find every occurrence of a set of categorized keywords in a text"""
+
+    def __init__(self, keywords: Dict[str, Iterable[str]]):
+        """
+        Args:
+            keywords: Mapping of category name to the keywords it contains.
+                A keyword may belong to several categories.
+        """
+        self.keywords: Dict[str, List[str]] = {
+            category: list(terms) for category, terms in keywords.items()
+        }
+
+        # term -> categories it is tagged with
+        self._categories: Dict[str, Tuple[str, ...]] = {}
+        for category, terms in self.keywords.items():
+            for term in terms:
+                tagged = self._categories.get(term, ())
+                if category not in tagged:
+                    self._categories[term] = tagged + (category,)
+
+        self._automaton = None
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for term, categories in self._categories.items():
+                automaton.add_word(term, (term, categories))
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str, str]]:
+        """
+        Yield every keyword occurrence in text (overlaps included)
+
+        Yields:
+            (start, end, category, term) with end exclusive
+        """
+        if not text:
+            return
+
+        if self._automaton is not None:
+            for last, (term, categories) in self._automaton.iter(text):
+                start = last - len(term) + 1
+                for category in categories:
+                    yield start, last + 1, category, term
+            return
+
+        for term, categories in self._categories.items():
+            start = text.find(term)
+            while start != -1:
+                for category in categories:
+                    yield start, start + len(term), category, term
+                start = text.find(term, start + 1)
+
+    def find(self, text: str) -> Dict[str, List[str]]:
+        """
+        Find the distinct keywords present in text
+
+        Returns:
+            Dict mapping each category to its matched keywords, in the order
+            they were declared
+        """
+        hits = {category: set() for category in self.keywords}
+        for _, _, category, term in self.iter_matches(text):
+            hits[category].add(term)
+
+        return {
+            category: [term for term in terms if term in hits[category]]
+            for category, terms in self.keywords.items()
+        }
+
+    def categories(self, text: str) -> Set[str]:
+        """Categories with at least one keyword present in text"""
+        return {category for _, _, category, _ in self.iter_matches(text)}
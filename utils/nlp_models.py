@@ -0,0 +1,134 @@
+"""
+Process-wide NLP model instances
+
+Loading a SentenceTransformer or a spaCy pipeline costs hundreds of
+milliseconds and tens to hundreds of MB, so every component shares one
+instance per process instead of loading its own.
+"""
+
+import threading
+from typing import Callable, Dict, Hashable, Sequence
+
+from config import Config
+
+_lock = threading.Lock()
+_models: Dict[Hashable, object] = {}
+
+
+def _load_once(key: Hashable, loader: Callable[[], object]):
+    """Return the cached model for key, calling loader on first use only"""
+    if key in _models:
+        return _models[key]
+
+    with _lock:
+        if key not in _models:
+            _models[key] = loader()
+
+    return _models[key]
+
+
+def _load_embedding_model():
+    try:
+        from sentence_transformers import SentenceTransformer  # type: ignore
+
+        backend = Config.EMBEDDING_BACKEND
+        model = None
+        if backend != "torch":
+            # ONNX Runtime / OpenVINO backends need sentence-transformers>=3.2
+            # plus the matching optimum extra; fall back to torch without them
+            model_kwargs = {}
+            if Config.EMBEDDING_MODEL_FILE:
+                # e.g. "onnx/model_qint8_avx2.onnx" for int8 dynamic quantized
+                # weights, exported with sentence_transformers'
+                # export_dynamic_quantized_onnx_model()
+                model_kwargs["file_name"] = Config.EMBEDDING_MODEL_FILE
+            try:
+                model = SentenceTransformer(
+                    Config.TRANSFORMER_MODEL,
+                    backend=backend,
+                    model_kwargs=model_kwargs,
+                )
+            except Exception as e:
+                print(
+                    f"Warning: Could not load the {backend} embedding backend "
+                    f"({type(e).__name__}: {e}). Using torch."
+                )
+        if model is None:
+            model = SentenceTransformer(Config.TRANSFORMER_MODEL)
+            if Config.EMBEDDING_FP16 and model.device.type == "cuda":
+                model.half()
+            _configure_torch()
+            # Inference only; encode() already runs without autograd
+            model.eval()
+        return model
+    except Exception as e:
+        # Catch ANY exception (import errors, version mismatches, download issues, etc.)
+        print(
+            f"Warning: Could not load embedding model ({type(e).__name__}: {e}). "
+            "Embeddings will be disabled."
+        )
+        return None
+
+
+def _configure_torch():
+    """Apply TORCH_THREADS to torch's CPU thread pools"""
+    if Config.TORCH_THREADS <= 0:
+        return
+
+    import torch  # type: ignore
+
+    torch.set_num_threads(Config.TORCH_THREADS)
+    try:
+        # Requests already run concurrently; one inter-op thread avoids
+        # oversubscribing the cores
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only allowed before torch has started any parallel work
+        pass
+
+
+def get_embedding_model():
+    """
+    Return the shared sentence embedding model, loading it on first use
+
+    Returns:
+        A SentenceTransformer, or None if sentence-transformers is missing or
+        the model could not be loaded (callers fall back to lexical matching)
+    """
+    return _load_once("embedding", _load_embedding_model)
+
+
+def _load_spacy_model(disable: Sequence[str]):
+    try:
+        import spacy  # type: ignore
+
+        try:
+            return spacy.load(Config.SPACY_MODEL, disable=list(disable))
+        except OSError:
+            print(
+                f"Warning: spaCy model '{Config.SPACY_MODEL}' not found. Using en_core_web_sm"
+            )
+        try:
+            return spacy.load("en_core_web_sm", disable=list(disable))
+        except OSError:
+            print("Warning: No spaCy model available.")
+            return None
+    except Exception as e:
+        print(
+            f"Warning: spaCy not available ({type(e).__name__}). Clause extraction will run in lightweight mode."
+        )
+        return None
+
+
+def get_spacy_model(disable: Sequence[str] = ()):
+    """
+    Return the shared spaCy pipeline, loading it on first use
+
+    Args:
+        disable: Pipeline components to skip at load time
+
+    Returns:
+        A spaCy Language, or None if spaCy or its models are unavailable
+    """
+    disable = tuple(disable)
+    return _load_once(("spacy", disable), lambda: _load_spacy_model(disable))
@@ -0,0 +1,51 @@
+"""
+Password hashing
+
+argon2-cffi is optional: when installed, new hashes use Argon2id, which is
+much cheaper to verify than werkzeug's default scrypt/pbkdf2 at comparable
+strength. Existing werkzeug hashes keep verifying either way.
+"""
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+try:
+    from argon2 import PasswordHasher  # type: ignore
+    from argon2.exceptions import InvalidHashError, VerificationError  # type: ignore
+
+    _argon2 = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
+except ModuleNotFoundError:
+    _argon2 = None
+
+ARGON2_PREFIX = "$argon2"
+
+
+def hash_password(password: str) -> str:
+    """Hash a password with Argon2id if available, else werkzeug's default"""
+    if _argon2 is not None:
+        return _argon2.hash(password)
+    return generate_password_hash(password)
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """Check a password against an Argon2 or werkzeug hash"""
+    if not password_hash or password is None:
+        return False
+
+    if password_hash.startswith(ARGON2_PREFIX):
+        if _argon2 is None:
+            return False
+        try:
+            return _argon2.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    return check_password_hash(password_hash, password)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """Whether a stored hash should be upgraded to the current scheme"""
+    if _argon2 is None:
+        return False
+    if not password_hash.startswith(ARGON2_PREFIX):
+        return True
+    return _argon2.check_needs_rehash(password_hash)
@@ -0,0 +1,53 @@
+"""
+Content-addressed storage for uploaded files
+
+Uploads are stored under the SHA-256 of their bytes, so re-uploading the same
+document reuses the existing file and two uploads that share a filename can no
+longer overwrite each other.
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Tuple
+
+
+def store_upload(
+    stream: BinaryIO, folder: str, extension: str, chunk_size: int = 1 << 20
+) -> Tuple[str, str]:
+    """
+    Copy a stream into folder, named by its content hash
+
+    The data is hashed while it is copied to a temporary file in the same
+    folder, then renamed into place, so the stream is read exactly once.
+
+    Args:
+        stream: Readable binary stream (e.g. an uploaded file's stream)
+        folder: Destination directory
+        extension: File extension to keep, including the dot (e.g. ".pdf");
+            document parsing dispatches on it
+        chunk_size: Bytes read per iteration
+
+    Returns:
+        (file_path, sha256 hex digest)
+    """
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            for chunk in iter(lambda: stream.read(chunk_size), b""):
+                digest.update(chunk)
+                tmp.write(chunk)
+
+        file_path = os.path.join(folder, digest.hexdigest() + extension.lower())
+        if os.path.exists(file_path):
+            # Same content already stored
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return file_path, digest.hexdigest()
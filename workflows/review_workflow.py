@@ -4,13 +4,13 @@ Workflow management for legal review process
 
 from datetime import datetime
 from typing import List, Dict, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session, selectinload
 
 from models.database import (
     Clause,
     ClauseReview,
     DecisionLog,
-    Interpretation,
     ReviewStatus,
     RiskLevel,
     Contract,
@@ -25,11 +25,20 @@ class ReviewWorkflow:
         self.session = session
 
     def assign_for_review(
-        self, clause_id: int, reviewer_name: str, reviewer_email: str
+        self,
+        clause_id: int,
+        reviewer_name: str,
+        reviewer_email: str,
+        commit: bool = True,
     ) -> ClauseReview:
         """
         Assign a clause for legal review
 
+        Args:
+            commit: Commit the assignment. With False the review is only
+                flushed (its id is set), so a caller assigning several
+                clauses can commit them together.
+
         Returns:
             ClauseReview object
         """
@@ -65,7 +74,10 @@ class ReviewWorkflow:
             made_by="SYSTEM",
         )
 
-        self.session.commit()
+        if commit:
+            self.session.commit()
+        else:
+            self.session.flush()
 
         return review
 
@@ -88,18 +100,54 @@ class ReviewWorkflow:
                 Clause.contract_id == contract_id,
                 Clause.risk_level.in_([RiskLevel.HIGH, RiskLevel.CRITICAL]),
             )
+            .order_by(Clause.id)
             .all()
         )
 
-        reviews = []
-        for clause in high_risk_clauses:
-            try:
-                review = self.assign_for_review(
-                    clause.id, reviewer_name, reviewer_email
-                )
-                reviews.append(review)
-            except Exception as e:
-                print(f"Error assigning clause {clause.id}: {e}")
+        # Clauses already in review keep their review, as in assign_for_review
+        existing = {}
+        for review in (
+            self.session.query(ClauseReview)
+            .filter(
+                ClauseReview.clause_id.in_([c.id for c in high_risk_clauses]),
+                ClauseReview.status == ReviewStatus.IN_REVIEW,
+            )
+            .order_by(ClauseReview.id)
+        ):
+            existing.setdefault(review.clause_id, review)
+
+        now = datetime.utcnow()
+        reviews = [
+            existing.get(clause.id)
+            or ClauseReview(
+                clause_id=clause.id,
+                status=ReviewStatus.IN_REVIEW,
+                reviewer_name=reviewer_name,
+                reviewer_email=reviewer_email,
+                assigned_at=now,
+            )
+            for clause in high_risk_clauses
+        ]
+        new_reviews = [review for review in reviews if review.id is None]
+        if not new_reviews:
+            return reviews
+
+        # One flush assigns every review id, then the logs, then one commit
+        self.session.add_all(new_reviews)
+        self.session.flush()
+        self._create_decision_logs_bulk(
+            [
+                {
+                    "review_id": review.id,
+                    "action": "ASSIGNED",
+                    "decision_text": f"Clause assigned to {reviewer_name} for review",
+                    "made_by": "SYSTEM",
+                    "made_at": now,
+                }
+                for review in new_reviews
+            ]
+        )
+        self.session.commit()
 
         return reviews
 
@@ -183,12 +231,10 @@ class ReviewWorkflow:
         rationale: Optional[str] = None,
     ):
         """Create a decision log entry"""
-        # Handle case where review doesn't have an ID yet
-        if review.id is None:
-            self.session.flush()  # Get the ID
-
+        # Linked through the relationship, so a review without an id yet is
+        # inserted first in the same flush instead of an extra one here
         log = DecisionLog(
-            review_id=review.id,
+            review=review,
             action=action,
             decision_text=decision_text,
             rationale=rationale,
@@ -200,6 +246,16 @@ class ReviewWorkflow:
 
         self.session.add(log)
 
+    def _create_decision_logs_bulk(self, rows: List[Dict]):
+        """
+        Insert decision log entries given as column dicts
+
+        One executemany INSERT, without building ORM objects; the rows are
+        not added to the session or to loaded review.decision_logs.
+        """
+        if rows:
+            self.session.execute(insert(DecisionLog), rows)
+
     def _format_review_decision(
         self, status: ReviewStatus, comments: Optional[str]
     ) -> str:
@@ -219,32 +275,30 @@ class ReviewWorkflow:
         Returns:
             List of review dictionaries with clause details
         """
-        query = self.session.query(ClauseReview).filter(
-            ClauseReview.status.in_(
-                [
-                    ReviewStatus.PENDING,
-                    ReviewStatus.IN_REVIEW,
-                    ReviewStatus.NEEDS_CLARIFICATION,
-                ]
+        # Reviews with their clause, contract and interpretations in two
+        # queries instead of three per review
+        query = (
+            self.session.query(ClauseReview, Clause, Contract)
+            .join(Clause, ClauseReview.clause_id == Clause.id)
+            .outerjoin(Contract, Clause.contract_id == Contract.id)
+            .options(selectinload(Clause.interpretations))
+            .filter(
+                ClauseReview.status.in_(
+                    [
+                        ReviewStatus.PENDING,
+                        ReviewStatus.IN_REVIEW,
+                        ReviewStatus.NEEDS_CLARIFICATION,
+                    ]
+                )
             )
         )
 
         if reviewer_email:
             query = query.filter(ClauseReview.reviewer_email == reviewer_email)
 
-        reviews = query.all()
-
         result = []
-        for review in reviews:
-            clause = self.session.query(Clause).filter_by(id=review.clause_id).first()
-            contract = (
-                self.session.query(Contract).filter_by(id=clause.contract_id).first()
-            )
-
-            # Get interpretations for this clause
-            interpretations = (
-                self.session.query(Interpretation).filter_by(clause_id=clause.id).all()
-            )
+        for review, clause, contract in query.order_by(ClauseReview.id):
+            interpretations = clause.interpretations
 
             result.append(
                 {
@@ -280,20 +334,22 @@ class ReviewWorkflow:
         if not contract:
             raise ValueError(f"Contract {contract_id} not found")
 
-        total_clauses = len(contract.clauses)
+        total_clauses = (
+            self.session.query(func.count(Clause.id))
+            .filter(Clause.contract_id == contract_id)
+            .scalar()
+        )
 
-        # Count reviews by status
-        status_counts = {}
-        for status in ReviewStatus:
-            count = (
-                self.session.query(ClauseReview)
-                .join(Clause)
-                .filter(
-                    Clause.contract_id == contract_id, ClauseReview.status == status
-                )
-                .count()
+        # Count reviews by status in one grouped query
+        status_counts = {
+            status.value.lower(): count
+            for status, count in self.session.query(
+                ClauseReview.status, func.count(ClauseReview.id)
             )
-            status_counts[status.value.lower()] = count
+            .join(Clause)
+            .filter(Clause.contract_id == contract_id)
+            .group_by(ClauseReview.status)
+        }
 
         return ReviewWorkflowStatus(
             total_clauses=total_clauses,
@@ -311,11 +367,21 @@ class ReviewWorkflow:
         Returns:
             List of decision log dictionaries
         """
+        # Streamed in batches; the entries are built from plain rows
         logs = (
-            self.session.query(DecisionLog)
-            .filter_by(review_id=review_id)
+            self.session.query(
+                DecisionLog.id,
+                DecisionLog.action,
+                DecisionLog.decision_text,
+                DecisionLog.rationale,
+                DecisionLog.previous_state,
+                DecisionLog.new_state,
+                DecisionLog.made_by,
+                DecisionLog.made_at,
+            )
+            .filter(DecisionLog.review_id == review_id)
             .order_by(DecisionLog.made_at)
-            .all()
+            .yield_per(500)
         )
 
         return [